@@ -1,14 +1,27 @@
+import bisect
 import random
 import time
+from array import array
 from typing import List, Tuple, Optional
 
 
+# Default card values for boards with more than 26 pairs, built once at import
+_DEFAULT_VALUES = (
+    tuple(range(1, 26))
+    + tuple(chr(ord('A') + i) for i in range(26))
+    + ('@', '#', '$', '%', '&', '*', '+', '=', '!', '?')
+    + tuple(f"{letter}{num}" for letter in "ABC" for num in range(1, 10))
+)
+
+
 class Card:
     """
     A class representing a memory card in the memory card game.
     Each card has a value, can be face up or face down, and can be matched or unmatched.
     """
     
+    __slots__ = ('value', 'card_id', 'is_face_up', 'is_matched')
+    
     def __init__(self, value, card_id=None):
         """
         Initialize a new card.
@@ -45,10 +58,126 @@ class Card:
         return f"Card(value={self.value}, card_id={self.card_id}, is_face_up={self.is_face_up}, is_matched={self.is_matched})"
 
 
+def _deal_and_shuffle(values_out, ids_out, pair_codes, rng=random):
+    """
+    Deal shuffled pairs of cards into preallocated arrays in a single pass.
+    
+    Cards 2i and 2i+1 form pair i and get value code pair_codes[i]. The
+    inside-out Fisher-Yates shuffle places each new card at a random slot
+    j <= i and moves the card that was there to slot i, so filling and
+    shuffling happen together without building any intermediate objects.
+    
+    Args:
+        values_out: Array receiving the value code for each slot
+        ids_out: Array receiving the card ID for each slot
+        pair_codes: Value code for each pair
+        rng: Random number source (the random module or a random.Random)
+    """
+    rand = rng.random
+    for card_id in range(len(ids_out)):
+        slot = int(rand() * (card_id + 1))
+        values_out[card_id] = values_out[slot]
+        ids_out[card_id] = ids_out[slot]
+        values_out[slot] = pair_codes[card_id >> 1]
+        ids_out[slot] = card_id
+
+
+def _iter_bits(mask):
+    """Yield the index of each set bit in mask, lowest first."""
+    while mask:
+        low_bit = mask & -mask
+        yield low_bit.bit_length() - 1
+        mask ^= low_bit
+
+
+class CardView:
+    """
+    A lightweight view of one card slot on a Board.
+    The card's state lives in the board's parallel arrays; the view only
+    remembers which slot it refers to, and reads and writes go straight through.
+    It exposes the same interface as Card so callers can use either.
+    """
+    
+    __slots__ = ('_board', '_index')
+    
+    def __init__(self, board, index):
+        """
+        Initialize a view of a board slot.
+        
+        Args:
+            board: The Board holding the card data
+            index: Flat index of the slot (row * cols + col)
+        """
+        self._board = board
+        self._index = index
+    
+    @property
+    def value(self):
+        """The value/content of the card."""
+        board = self._board
+        return board.value_table[board.values[self._index]]
+    
+    @property
+    def card_id(self):
+        """The unique identifier of the card."""
+        return self._board.card_ids[self._index]
+    
+    @property
+    def is_face_up(self):
+        """Whether the card is face up."""
+        return bool(self._board.face_up_mask >> self._index & 1)
+    
+    @is_face_up.setter
+    def is_face_up(self, face_up):
+        if face_up:
+            self._board.face_up_mask |= 1 << self._index
+        else:
+            self._board.face_up_mask &= ~(1 << self._index)
+    
+    @property
+    def is_matched(self):
+        """Whether the card has been matched."""
+        return bool(self._board.matched_mask >> self._index & 1)
+    
+    @is_matched.setter
+    def is_matched(self, matched):
+        if matched:
+            self._board.matched_mask |= 1 << self._index
+        else:
+            self._board.matched_mask &= ~(1 << self._index)
+    
+    def flip(self):
+        """Flip the card over (change its face up status)."""
+        self._board.face_up_mask ^= 1 << self._index
+    
+    def match(self):
+        """Mark the card as matched."""
+        self._board.matched_mask |= 1 << self._index
+    
+    def reset(self):
+        """Reset the card to its initial state (face down and unmatched)."""
+        self.is_face_up = False
+        self.is_matched = False
+    
+    def __str__(self):
+        """Return a string representation of the card."""
+        status = "matched" if self.is_matched else "face up" if self.is_face_up else "face down"
+        return f"Card({self.value}, {status})"
+    
+    def __repr__(self):
+        """Return a detailed string representation of the card."""
+        return f"Card(value={self.value}, card_id={self.card_id}, is_face_up={self.is_face_up}, is_matched={self.is_matched})"
+
+
 class Board:
     """
     A class representing the game board for the memory card game.
     This manages the collection of cards, game setup, and game state.
+    
+    Card state is stored per slot (row * cols + col): values holds an integer
+    code per card (see value_table) and card_ids the card's ID, as parallel
+    arrays, while face_up_mask and matched_mask keep one bit per slot. CardView
+    objects give a Card-like interface on top of this state.
     """
     
     def __init__(self, card_values, rows=4, cols=4):
@@ -62,8 +191,6 @@ class Board:
         """
         self.rows = rows
         self.cols = cols
-        self.cards = []
-        self.flipped_cards = []
         self.moves = 0
         self.matches = 0
         
@@ -81,19 +208,70 @@ class Board:
         # Use only the number of card values we need
         selected_values = card_values[:pairs_needed]
         
-        # Create pairs of cards
-        card_list = []
-        for i, value in enumerate(selected_values):
-            card_list.append(Card(value, card_id=i*2))
-            card_list.append(Card(value, card_id=i*2+1))
-        
-        # Shuffle the cards
-        random.shuffle(card_list)
-        
-        # Place cards on the board
-        self.cards = card_list
+        # Encode each distinct value as a small integer once, so matching
+        # compares ints and the arrays never hold Python objects
+        value_codes = {}
+        for value in selected_values:
+            value_codes.setdefault(value, len(value_codes))
+        self.value_table = list(value_codes)
+        # Display string for each value code, converted once
+        self._value_strs = [str(value) for value in self.value_table]
+        self._pair_codes = array('i', [value_codes[value] for value in selected_values])
+        
+        # Deal and shuffle the cards straight into preallocated arrays
+        self._rng = random.Random()
+        self.values = array('i', [0]) * total_cards
+        self.card_ids = array('i', [0]) * total_cards
+        _deal_and_shuffle(self.values, self.card_ids, self._pair_codes, self._rng)
+        self._rebuild_id_to_index()
+        
+        # Bit i of each mask is the flag for slot i
+        self.face_up_mask = 0
+        self.matched_mask = 0
+        self._full_mask = (1 << total_cards) - 1
+        
+        # (row, col) of every slot, so position lookups skip the divmod
+        self._positions = tuple(divmod(index, cols) for index in range(total_cards))
+        
+        # Indices of the (at most two) cards flipped in the current move
+        self._flipped = []
+        
+        # Bumped whenever the layout changes; with the two masks it
+        # identifies the board state, see state_key()
+        self._version = 0
+        
+        # Last results of cell_strings (per hidden marker) and __str__,
+        # stored as (state key, result)
+        self._cells_cache = {}
+        self._str_cache = None
+        
+        # One view per slot, created once and reused
+        self._views = tuple(CardView(self, index) for index in range(total_cards))
+    
+    @property
+    def cards(self) -> Tuple[CardView, ...]:
+        """All cards on the board, in slot order."""
+        return self._views
+    
+    @property
+    def flipped_cards(self) -> List[CardView]:
+        """Cards flipped in the current move that are not yet matched or reset."""
+        return [self._views[index] for index in self._flipped]
+    
+    def _rebuild_id_to_index(self) -> None:
+        """Rebuild the card ID -> slot index lookup after the cards move."""
+        id_to_index = array('i', [0]) * len(self.card_ids)
+        for index, card_id in enumerate(self.card_ids):
+            id_to_index[card_id] = index
+        self.id_to_index = id_to_index
+    
+    def _index(self, row, col) -> int:
+        """Return the flat slot index for a position, or -1 if it is invalid."""
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return row * self.cols + col
+        return -1
     
-    def get_card(self, row, col) -> Optional[Card]:
+    def get_card(self, row, col) -> Optional[CardView]:
         """
         Get the card at the specified position.
         
@@ -104,11 +282,10 @@ class Board:
         Returns:
             Card at the specified position or None if position is invalid
         """
-        if 0 <= row < self.rows and 0 <= col < self.cols:
-            index = row * self.cols + col
-            if 0 <= index < len(self.cards):
-                return self.cards[index]
-        return None
+        index = self._index(row, col)
+        if index < 0:
+            return None
+        return self._views[index]
     
     def get_card_position(self, card_id) -> Tuple[int, int]:
         """
@@ -120,12 +297,11 @@ class Board:
         Returns:
             Tuple of (row, col) or (-1, -1) if not found
         """
-        for i, card in enumerate(self.cards):
-            if card.card_id == card_id:
-                return divmod(i, self.cols)
+        if 0 <= card_id < len(self.id_to_index):
+            return self._positions[self.id_to_index[card_id]]
         return (-1, -1)
     
-    def flip_card(self, row, col) -> bool:
+    def flip_card(self, row, col) -> Optional[CardView]:
         """
         Flip a card at the specified position.
         
@@ -134,65 +310,110 @@ class Board:
             col: Column index
             
         Returns:
-            True if flip was successful, False otherwise
+            The flipped card if flip was successful, None otherwise
         """
-        card = self.get_card(row, col)
-        if card and not card.is_matched and not card.is_face_up:
-            card.flip()
-            self.flipped_cards.append(card)
-            
-            # If we have flipped two cards, check for a match
-            if len(self.flipped_cards) == 2:
-                self.moves += 1
-                if self.flipped_cards[0].value == self.flipped_cards[1].value:
-                    # We have a match
-                    self.flipped_cards[0].match()
-                    self.flipped_cards[1].match()
-                    self.matches += 1
-                    self.flipped_cards = []
-                    return True
-            return True
-        return False
+        index = self._index(row, col)
+        if index < 0:
+            return None
+        bit = 1 << index
+        if (self.face_up_mask | self.matched_mask) & bit:
+            return None
+        
+        self.face_up_mask |= bit
+        self._flipped.append(index)
+        
+        # If we have flipped two cards, check for a match
+        if len(self._flipped) == 2:
+            self.moves += 1
+            first, second = self._flipped
+            if self.values[first] == self.values[second]:
+                # We have a match
+                self.matched_mask |= (1 << first) | (1 << second)
+                self.matches += 1
+                self._flipped.clear()
+        return self._views[index]
+    
+    def get_face_up_unmatched(self) -> List[CardView]:
+        """
+        Get the cards that are face up but not matched yet.
+        
+        Returns:
+            List of cards in board order
+        """
+        views = self._views
+        return [views[index] for index in _iter_bits(self.face_up_mask & ~self.matched_mask)]
     
     def reset_unmatched(self) -> None:
         """Reset all unmatched cards to face down."""
-        for card in self.cards:
-            if not card.is_matched and card.is_face_up:
-                card.flip()
-        self.flipped_cards = []
+        self.face_up_mask &= self.matched_mask
+        self._flipped.clear()
     
     def reset_game(self) -> None:
         """Reset the entire game board."""
-        random.shuffle(self.cards)
-        for card in self.cards:
-            card.reset()
-        self.flipped_cards = []
+        # Shuffle one permutation and gather both arrays through it
+        perm = list(range(len(self.card_ids)))
+        self._rng.shuffle(perm)
+        self.card_ids = array('i', map(self.card_ids.__getitem__, perm))
+        self.values = array('i', map(self.values.__getitem__, perm))
+        self._rebuild_id_to_index()
+        self.face_up_mask = 0
+        self.matched_mask = 0
+        self._flipped.clear()
+        self._version += 1
         self.moves = 0
         self.matches = 0
     
     def is_game_over(self) -> bool:
         """Check if all pairs have been matched."""
-        total_pairs = len(self.cards) // 2
-        return self.matches == total_pairs
+        return self.matched_mask == self._full_mask
+    
+    def state_key(self) -> Tuple[int, int, int]:
+        """
+        Get a key that changes whenever the visible board state changes.
+        
+        Cards can be flipped through their views as well as through
+        flip_card, so the masks themselves are part of the key rather than
+        a counter bumped by each mutating method.
+        """
+        return (self._version, self.face_up_mask, self.matched_mask)
+    
+    def cell_strings(self, hidden="?") -> List[str]:
+        """
+        Get the display string of every slot in row-major order.
+        
+        Args:
+            hidden: String used for face-down cards
+            
+        Returns:
+            List with "M" for matched cards, the value for face-up cards
+            and `hidden` for the rest
+        """
+        key = self.state_key()
+        cached = self._cells_cache.get(hidden)
+        if cached is not None and cached[0] == key:
+            return list(cached[1])
+        
+        cells = [hidden] * len(self.values)
+        # Only visit the slots whose bits are set instead of scanning the board
+        for index in _iter_bits(self.face_up_mask & ~self.matched_mask):
+            cells[index] = self._value_strs[self.values[index]]
+        for index in _iter_bits(self.matched_mask):
+            cells[index] = "M"
+        self._cells_cache[hidden] = (key, tuple(cells))
+        return cells
     
     def __str__(self) -> str:
         """Return a string representation of the board."""
-        result = []
-        for row in range(self.rows):
-            row_cards = []
-            for col in range(self.cols):
-                card = self.get_card(row, col)
-                if card:
-                    if card.is_matched:
-                        row_cards.append("M")
-                    elif card.is_face_up:
-                        row_cards.append(str(card.value))
-                    else:
-                        row_cards.append("#")
-                else:
-                    row_cards.append("?")
-            result.append(" ".join(row_cards))
-        return "\n".join(result)
+        key = self.state_key()
+        if self._str_cache is not None and self._str_cache[0] == key:
+            return self._str_cache[1]
+        
+        cells = self.cell_strings("#")
+        cols = self.cols
+        result = "\n".join(" ".join(cells[start:start + cols])
+                           for start in range(0, len(cells), cols))
+        self._str_cache = (key, result)
+        return result
 
 
 class Player:
@@ -201,6 +422,8 @@ class Player:
     Tracks player information and score.
     """
     
+    __slots__ = ('name', 'score', 'moves', 'matches', 'best_time')
+    
     def __init__(self, name="Player"):
         """
         Initialize a new player.
@@ -252,11 +475,19 @@ class Player:
 class ScoreBoard:
     """
     A class for tracking and displaying scores in the memory card game.
+    
+    high_scores is kept sorted best first as games end, with a parallel list
+    of negated scores to bisect on, so reading it never needs a sort.
     """
     
+    MAX_HIGH_SCORES = 10
+    
+    __slots__ = ('high_scores', '_neg_scores', 'current_game_stats')
+    
     def __init__(self):
         """Initialize a new scoreboard."""
         self.high_scores = []
+        self._neg_scores = []
         self.current_game_stats = {
             "player": None,
             "start_time": 0,
@@ -299,9 +530,16 @@ class ScoreBoard:
             "time": game_time
         }
         
-        self.high_scores.append(game_stats)
-        self.high_scores.sort(key=lambda x: x["score"], reverse=True)
-        self.high_scores = self.high_scores[:10]  # Keep only top 10
+        # bisect_right puts the new game after equal scores, so earlier
+        # games win ties as they would with a stable sort
+        neg_score = -game_stats["score"]
+        position = bisect.bisect_right(self._neg_scores, neg_score)
+        if position < self.MAX_HIGH_SCORES:
+            self._neg_scores.insert(position, neg_score)
+            self.high_scores.insert(position, game_stats)
+            if len(self.high_scores) > self.MAX_HIGH_SCORES:
+                self._neg_scores.pop()
+                self.high_scores.pop()
         
         return game_stats
     
@@ -349,16 +587,12 @@ class Game:
             # Create enough unique values for the board size
             pairs_needed = (rows * cols) // 2
             
-            # For a large grid, use a combination of numbers and letters
+            # For a large grid, use a combination of numbers, letters and symbols
             if pairs_needed > 26:
-                numbers = list(range(1, 26))
-                letters = [chr(ord('A') + i) for i in range(26)]
-                symbols = ['@', '#', '$', '%', '&', '*', '+', '=', '!', '?']
-                card_values = numbers + letters + symbols
-                # Add numbered letters if we need even more values
-                if pairs_needed > len(card_values):
-                    extra_values = [f"{letter}{num}" for letter in ['A', 'B', 'C'] for num in range(1, 10)]
-                    card_values.extend(extra_values[:pairs_needed - len(card_values)])
+                if pairs_needed > len(_DEFAULT_VALUES):
+                    raise ValueError(f"Board too large for default card values. "
+                                     f"At most {len(_DEFAULT_VALUES)} pairs are available.")
+                card_values = list(_DEFAULT_VALUES[:pairs_needed])
             else:
                 card_values = list(range(1, pairs_needed + 1))
         
@@ -395,14 +629,11 @@ class Game:
         if len(self.board.flipped_cards) == 2:
             self.board.reset_unmatched()
         
-        result = self.board.flip_card(row, col)
+        card = self.board.flip_card(row, col)
         
-        if not result:
+        if card is None:
             return "Invalid move. Try again."
         
-        # Get the card that was just flipped
-        card = self.board.get_card(row, col)
-        
         # If this completes a pair of flipped cards
         if len(self.board.flipped_cards) == 2:
             self.player.add_move()
@@ -447,22 +678,10 @@ class Game:
         Returns:
             2D array representing the board state
         """
-        board_state = []
-        for row in range(self.board.rows):
-            row_state = []
-            for col in range(self.board.cols):
-                card = self.board.get_card(row, col)
-                if card:
-                    if card.is_matched:
-                        row_state.append("M")  # Matched
-                    elif card.is_face_up:
-                        row_state.append(str(card.value))  # Face up, showing value
-                    else:
-                        row_state.append("?")  # Face down
-                else:
-                    row_state.append(" ")  # Empty
-            board_state.append(row_state)
-        return board_state
+        # "M" for matched, the value for face up and "?" for face down
+        cells = self.board.cell_strings("?")
+        cols = self.board.cols
+        return [cells[start:start + cols] for start in range(0, len(cells), cols)]
     
     def __str__(self):
         """Return a string representation of the game state."""
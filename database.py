@@ -1,6 +1,5 @@
 import sqlite3
 import os
-import datetime
 from typing import Dict, List, Optional, Tuple, Any
 
 
@@ -10,6 +9,27 @@ class GameDatabase:
     game statistics for the Memory Card game.
     """
     
+    # Connection tuning applied each time the database is opened. WAL with
+    # synchronous=NORMAL turns each commit into an append to the log instead
+    # of a full fsync of the database file.
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA mmap_size=268435456",
+    )
+    
+    # Kept as a constant so every insert reuses sqlite3's cached statement
+    INSERT_GAME_STATS_SQL = '''
+        INSERT INTO game_stats 
+        (player_name, difficulty, start_time, end_time, duration_seconds, 
+         moves, matches, errors, completed)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+    
+    # Bumped whenever initialize_db has to migrate existing rows
+    SCHEMA_VERSION = 2
+    
     def __init__(self, db_file="memory_game.db"):
         """
         Initialize the database connection.
@@ -32,16 +52,28 @@ class GameDatabase:
             
             # Connect to database (creates it if it doesn't exist)
             self.conn = sqlite3.connect(self.db_file)
+            # sqlite3.Row gives name-based access and converts to dict in C
+            self.conn.row_factory = sqlite3.Row
             self.cursor = self.conn.cursor()
             
+            for pragma in self.PRAGMAS:
+                self.cursor.execute(pragma)
+            # SQLite silently keeps the old journal mode where WAL isn't
+            # possible (e.g. some network filesystems); say so, as every
+            # commit then pays for full fsyncs again. In-memory databases
+            # always report "memory".
+            journal_mode = self.cursor.execute("PRAGMA journal_mode").fetchone()[0]
+            if journal_mode.lower() not in ("wal", "memory"):
+                print(f"Warning: database is using journal_mode={journal_mode}, not WAL")
+            
             # Create game_stats table if it doesn't exist
             self.cursor.execute('''
                 CREATE TABLE IF NOT EXISTS game_stats (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     player_name TEXT NOT NULL,
                     difficulty TEXT NOT NULL,
-                    start_time TIMESTAMP NOT NULL,
-                    end_time TIMESTAMP NOT NULL,
+                    start_time REAL NOT NULL,
+                    end_time REAL NOT NULL,
                     duration_seconds REAL NOT NULL,
                     moves INTEGER NOT NULL,
                     matches INTEGER NOT NULL,
@@ -50,14 +82,58 @@ class GameDatabase:
                 )
             ''')
             
+            self._migrate_schema()
+            
+            # Indexes matching the leaderboard and player queries, so they are
+            # answered by index range scans instead of a full scan and sort
+            self.cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_leaderboard
+                ON game_stats(completed, difficulty, duration_seconds, errors)
+            ''')
+            self.cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_player_time
+                ON game_stats(player_name, start_time DESC)
+            ''')
+            self.cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_player_best
+                ON game_stats(player_name, completed, difficulty, duration_seconds)
+            ''')
+            
             self.conn.commit()
             print("Database initialized successfully.")
         except sqlite3.Error as e:
             print(f"Database initialization error: {e}")
     
+    def _migrate_schema(self) -> None:
+        """Bring rows written by older versions up to the current schema."""
+        version = self.cursor.execute("PRAGMA user_version").fetchone()[0]
+        if version >= self.SCHEMA_VERSION:
+            return
+        
+        # Version 1: times used to be stored as local datetime strings, now
+        # they are UNIX timestamps like the callers (and the server) use
+        if version < 1:
+            for column in ("start_time", "end_time"):
+                self.cursor.execute(f'''
+                    UPDATE game_stats
+                    SET {column} = (julianday({column}, 'utc') - 2440587.5) * 86400.0
+                    WHERE typeof({column}) = 'text'
+                ''')
+        # Version 2: idx_leaderboard gained the errors tie-break column; drop
+        # the old one so initialize_db recreates it
+        if version < 2:
+            self.cursor.execute("DROP INDEX IF EXISTS idx_leaderboard")
+        self.cursor.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+    
     def close(self) -> None:
         """Close the database connection."""
         if self.conn:
+            try:
+                # Recommended before closing: refresh planner statistics for
+                # any tables whose shape changed noticeably this session
+                self.conn.execute("PRAGMA optimize")
+            except sqlite3.Error:
+                pass
             self.conn.close()
             self.conn = None
             self.cursor = None
@@ -69,7 +145,8 @@ class GameDatabase:
                        end_time: float,
                        moves: int,
                        matches: int,
-                       completed: bool = True) -> int:
+                       completed: bool = True,
+                       commit: bool = True) -> int:
         """
         Save game statistics to the database.
         
@@ -81,6 +158,8 @@ class GameDatabase:
             moves: Number of moves taken
             matches: Number of matches found
             completed: Whether the game was completed or abandoned
+            commit: Whether to commit right away; pass False to batch several
+                    saves into one transaction and commit them yourself
             
         Returns:
             ID of the inserted record
@@ -89,30 +168,58 @@ class GameDatabase:
             if not self.conn:
                 self.initialize_db()
             
-            # Calculate derived stats
-            duration_seconds = end_time - start_time
-            errors = max(0, moves - matches)
+            row = self._game_stats_row(
+                player_name, difficulty, start_time, end_time, moves, matches, completed
+            )
             
-            # Convert timestamps to datetime format for SQLite
-            start_datetime = datetime.datetime.fromtimestamp(start_time)
-            end_datetime = datetime.datetime.fromtimestamp(end_time)
+            if commit:
+                # Commits on success and rolls back if the insert fails
+                with self.conn:
+                    self.cursor.execute(self.INSERT_GAME_STATS_SQL, row)
+            else:
+                self.cursor.execute(self.INSERT_GAME_STATS_SQL, row)
+            return self.cursor.lastrowid
+        except sqlite3.Error as e:
+            print(f"Error saving game stats: {e}")
+            return -1
+    
+    def save_game_stats_many(self, stats_rows) -> int:
+        """
+        Save several games' statistics in a single transaction.
+        
+        Args:
+            stats_rows: Iterable of dictionaries with the same keys as the
+                        arguments of save_game_stats (completed is optional)
             
-            self.cursor.execute('''
-                INSERT INTO game_stats 
-                (player_name, difficulty, start_time, end_time, duration_seconds, 
-                 moves, matches, errors, completed)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                player_name, difficulty, start_datetime, end_datetime, 
-                duration_seconds, moves, matches, errors, completed
-            ))
+        Returns:
+            Number of records inserted, or -1 on error
+        """
+        try:
+            if not self.conn:
+                self.initialize_db()
             
-            self.conn.commit()
-            return self.cursor.lastrowid
+            rows = [self._game_stats_row(**stats) for stats in stats_rows]
+            with self.conn:
+                self.conn.executemany(self.INSERT_GAME_STATS_SQL, rows)
+            return len(rows)
         except sqlite3.Error as e:
             print(f"Error saving game stats: {e}")
             return -1
     
+    def _game_stats_row(self, player_name, difficulty, start_time, end_time,
+                        moves, matches, completed=True) -> tuple:
+        """Build the INSERT parameters for one game, including derived stats."""
+        # Calculate derived stats
+        duration_seconds = end_time - start_time
+        errors = max(0, moves - matches)
+        
+        # Times are stored as UNIX timestamps; use datetime(start_time,
+        # 'unixepoch') in SQL where a formatted date is needed
+        return (
+            player_name, difficulty, start_time, end_time, 
+            duration_seconds, moves, matches, errors, completed
+        )
+    
     def get_player_stats(self, player_name: str) -> List[Dict[str, Any]]:
         """
         Retrieve all game statistics for a specific player.
@@ -135,8 +242,7 @@ class GameDatabase:
                 ORDER BY start_time DESC
             ''', (player_name,))
             
-            columns = [col[0] for col in self.cursor.description]
-            return [dict(zip(columns, row)) for row in self.cursor.fetchall()]
+            return [dict(row) for row in self.cursor]
         except sqlite3.Error as e:
             print(f"Error retrieving player stats: {e}")
             return []
@@ -180,8 +286,7 @@ class GameDatabase:
             print(f"Executing leaderboard query: {query} with params {params}")
             
             self.cursor.execute(query, params)
-            results = [dict(zip([col[0] for col in self.cursor.description], row)) 
-                      for row in self.cursor.fetchall()]
+            results = [dict(row) for row in self.cursor]
             
             # Debug the results
             for i, result in enumerate(results):
@@ -266,8 +371,7 @@ class GameDatabase:
                 LIMIT ?
             ''', (limit,))
             
-            columns = [col[0] for col in self.cursor.description]
-            return [dict(zip(columns, row)) for row in self.cursor.fetchall()]
+            return [dict(row) for row in self.cursor]
         except sqlite3.Error as e:
             print(f"Error retrieving recent games: {e}")
             return []
@@ -4,14 +4,29 @@ Use this as an alternative to the original database.py when server integration i
 """
 import sqlite3
 import os
-import datetime
 import time
-import uuid
 import threading
+import queue
+import atexit
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Dict, List, Optional, Tuple, Any
+from urllib.parse import quote
 import sys
 import random
+import logging
+import json
+import gzip
+
+try:
+    # Optional: several times faster than the json module for our payloads
+    import orjson
+except ImportError:
+    orjson = None
 
 # Add parent directory to path to allow importing shared modules
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -22,17 +37,118 @@ from shared.models import GameStats
 # Import original database implementation to extend it
 from database import GameDatabase as OriginalGameDatabase
 
+log = logging.getLogger(__name__)
+
 # Server configuration
 SERVER_URL = "http://localhost:5000"
 # Generate a unique client ID if none exists
 CLIENT_ID_FILE = ".client_id"
-if os.path.exists(CLIENT_ID_FILE):
-    with open(CLIENT_ID_FILE, "r") as f:
-        CLIENT_ID = f.read().strip()
-else:
-    CLIENT_ID = str(uuid.uuid4())
-    with open(CLIENT_ID_FILE, "w") as f:
-        f.write(CLIENT_ID)
+
+def _load_client_id(path=CLIENT_ID_FILE):
+    """Read the stored client ID, creating the file with a new one if missing."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except FileNotFoundError:
+        # Only needed the first time the game runs
+        import uuid
+        client_id = str(uuid.uuid4())
+        try:
+            # O_EXCL creates the file atomically, readable only by this user
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            # Another process created it in the meantime; use theirs
+            return _load_client_id(path)
+        try:
+            os.write(fd, client_id.encode())
+        finally:
+            os.close(fd)
+        return client_id
+    try:
+        return os.read(fd, 64).decode().strip()
+    finally:
+        os.close(fd)
+
+# Loaded on first use by get_client_id() so importing this module has no
+# side effects
+CLIENT_ID = None
+_client_id_lock = threading.Lock()
+
+def get_client_id() -> str:
+    """Return this installation's client ID, loading it on first call."""
+    global CLIENT_ID
+    if CLIENT_ID is None:
+        with _client_id_lock:
+            if CLIENT_ID is None:
+                CLIENT_ID = _load_client_id()
+    return CLIENT_ID
+
+
+def _json_loads(content: bytes):
+    """Decode a JSON response body."""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def _json_dumps(obj) -> bytes:
+    """Encode a request body as JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode()
+
+
+JSON_HEADERS = {'Content-Type': 'application/json'}
+GZIP_JSON_HEADERS = {'Content-Type': 'application/json', 'Content-Encoding': 'gzip'}
+# Bodies larger than this many bytes are gzipped before upload
+GZIP_MIN_BYTES = 1024
+
+
+def _encode_json_body(obj, compress: bool = False) -> Tuple[bytes, Dict[str, str]]:
+    """Encode a request body as JSON, gzipped if compress is set and it is large."""
+    body = _json_dumps(obj)
+    if compress and len(body) > GZIP_MIN_BYTES:
+        # Level 1 already shrinks repetitive JSON several times over
+        return gzip.compress(body, compresslevel=1), GZIP_JSON_HEADERS
+    return body, JSON_HEADERS
+
+
+def _normalize_server_url(server_url):
+    """Add the http:// scheme and a trailing slash to a server URL if missing."""
+    if server_url and not server_url.startswith(('http://', 'https://')):
+        server_url = 'http://' + server_url
+    if server_url and not server_url.endswith('/'):
+        server_url += '/'
+    return server_url
+
+
+def _create_http_session() -> requests.Session:
+    """
+    Create the HTTP session used to talk to the server.
+    
+    The session keeps connections to the server alive between calls, retries
+    idempotent requests only on 502/503/504 responses, and sends headers that
+    stop any proxy from serving stale stats. Failed connects and read
+    timeouts are not retried here: callers fall back to local data (or retry
+    uploads themselves), and a probe of an unresponsive server shouldn't wait
+    out its timeout three times.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=8,
+        max_retries=Retry(total=2, connect=0, read=0, other=0,
+                          backoff_factor=0.2,
+                          status_forcelist=[502, 503, 504],
+                          raise_on_status=False)
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({
+        'Cache-Control': 'no-cache, no-store, must-revalidate',
+        'Pragma': 'no-cache',
+        'Expires': '0'
+    })
+    return session
 
 
 class SyncGameDatabase(OriginalGameDatabase):
@@ -42,26 +158,150 @@ class SyncGameDatabase(OriginalGameDatabase):
     data properly isolated from each other.
     """
     
+    # On top of the base tuning: wait for locks instead of failing while the
+    # cache refresh holds the write lock, and use a ~20 MB page cache
+    PRAGMAS = OriginalGameDatabase.PRAGMAS + (
+        "PRAGMA busy_timeout=30000",
+        "PRAGMA cache_size=-20000",
+    )
+    
+    # Indexes initialize_sync_table creates on game_stats
+    SYNC_INDEXES = (
+        "idx_game_stats_source_difficulty",
+        "idx_local_leaderboard",
+        "idx_game_stats_unsynced",
+        "idx_game_stats_player_source",
+        "idx_game_stats_server_id",
+    )
+    
+    # Run PRAGMA optimize after this many local saves
+    OPTIMIZE_EVERY = 50
+    
+    # Recorded in the one-row sync_schema table once the sync columns exist;
+    # bump it when _ensure_source_column_exists learns a new column.
+    # (PRAGMA user_version belongs to GameDatabase's own migrations.)
+    SYNC_SCHEMA_VERSION = 1
+    
+    # Columns sent to the server when syncing stored games; format with the
+    # '?' placeholder list for the IDs
+    SYNC_SELECT_SQL = '''
+        SELECT id AS local_id, player_name, difficulty, start_time, end_time, 
+               duration_seconds, moves, matches, errors, completed
+        FROM game_stats
+        WHERE id IN ({})
+    '''
+    # Local-only leaderboard used when server data is unavailable, with and
+    # without a difficulty filter; fixed strings so sqlite3 reuses the plans
+    LOCAL_LEADERBOARD_SQL = '''
+        SELECT id, player_name, difficulty, start_time, end_time, 
+               duration_seconds, errors, source
+        FROM game_stats 
+        WHERE completed = 1 AND source = 'local'
+        ORDER BY duration_seconds ASC, errors ASC LIMIT ?
+    '''
+    LOCAL_LEADERBOARD_DIFFICULTY_SQL = '''
+        SELECT id, player_name, difficulty, start_time, end_time, 
+               duration_seconds, errors, source
+        FROM game_stats 
+        WHERE completed = 1 AND source = 'local' AND difficulty = ?
+        ORDER BY duration_seconds ASC, errors ASC LIMIT ?
+    '''
+    # Games played on this client, and leaderboard rows cached from the server
+    # (a server record that is somehow already cached is skipped)
+    INSERT_LOCAL_GAME_SQL = '''
+        INSERT INTO game_stats (
+            player_name, difficulty, start_time, end_time, 
+            duration_seconds, moves, matches, errors, completed, source
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 'local')
+    '''
+    INSERT_SERVER_GAME_SQL = '''
+        INSERT OR IGNORE INTO game_stats 
+        (player_name, difficulty, start_time, end_time, 
+         duration_seconds, moves, matches, errors, completed, source, server_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1, 'server', ?)
+    '''
+    # Shared by the main thread and the upload worker's connection
+    MARK_SYNCED_SQL = '''
+        UPDATE game_stats
+        SET synced = 1, last_sync_attempt = ?
+        WHERE id = ?
+    '''
+    # Local games still waiting for upload, in pages after the given ID;
+    # served by the idx_game_stats_unsynced partial index
+    PENDING_SELECT_SQL = '''
+        SELECT id AS local_id, player_name, difficulty, start_time, end_time, 
+               duration_seconds, moves, matches, errors, completed
+        FROM game_stats
+        WHERE synced = 0 AND source = 'local' AND id > ?
+        ORDER BY id
+        LIMIT ?
+    '''
+    
+    # Seconds a server connection check result is reused before probing again
+    CONNECTION_CHECK_TTL = 15.0
+    # Seconds a connection check waits for the server
+    PROBE_TIMEOUT = 1.5
+    
+    # Uploads are sent in batches of up to BULK_MAX games, waiting at most
+    # BULK_WAIT seconds for more saves to arrive
+    BULK_MAX = 100
+    BULK_WAIT = 0.2
+    # Most games waiting for upload; later saves stay local until synced
+    OUT_Q_MAX = 10000
+    
+    # Seconds a decoded leaderboard or player stats response is reused
+    RESPONSE_CACHE_TTL = 15.0
+    
+    # Number of recently saved games remembered to drop repeated saves
+    RECENT_SAVES_MAX = 64
+    
+    # Queued by force_sync_all to wake the worker for the pending games
+    _SYNC_PENDING = object()
+    
     def __init__(self, db_file="memory_game.db", server_url=SERVER_URL):
         """Initialize the database connection with sync capabilities."""
         # Use a different database file for remote mode to ensure isolation
         remote_db_file = "remote_" + db_file
         super().__init__(remote_db_file)
+        # Autocommit mode; writes that belong together go through _txn()
+        self.conn.isolation_level = None
+        self._columns_checked = False
         
-        # Ensure server_url has the correct format with http:// prefix
-        if server_url and not server_url.startswith(('http://', 'https://')):
-            server_url = 'http://' + server_url
+        self.server_url = _normalize_server_url(server_url)
+        self.client_id = get_client_id()
         
-        # Ensure URL ends with a trailing slash for consistency
-        if server_url and not server_url.endswith('/'):
-            server_url += '/'
-            
-        self.server_url = server_url
-        print(f"Initializing sync database with server URL: {self.server_url}")
+        # Endpoint URLs, built once; the templated ones take %-formatting
+        base_url = self.server_url.rstrip('/')
+        self._health_url = f"{base_url}/api/health"
+        self._save_url = f"{base_url}/api/stats/save"
+        self._save_bulk_url = f"{base_url}/api/stats/save_bulk"
+        self._count_url = f"{base_url}/api/stats/count"
+        self._leaderboard_url = f"{base_url}/api/stats/leaderboard/%s"
+        self._player_url = f"{base_url}/api/stats/player/%s"
+        log.info("Initializing sync database with server URL: %s", self.server_url)
         
-        # Don't use a sync queue since we'll only write directly when a game ends
         self.online = False   # Assume offline until we verify connection
         self.using_cached_data = False  # Flag to indicate if we're using cached data
+        self._saves_since_optimize = 0
+        self.http = _create_http_session()
+        # Threads for overlapping independent GETs; created on first use
+        self._http_pool = None
+        # Monotonic time of the last connection check, None before the first
+        self._last_probe = None
+        # (endpoint, args) -> (monotonic time, decoded body); cleared after
+        # uploads so players see their new games
+        self._resp_cache = {}
+        self._resp_cache_lock = threading.Lock()
+        
+        # Games are uploaded by a background worker when they are saved
+        self._bulk_supported = True
+        # Set when games stayed local (offline, or the queue was full) and
+        # must be picked up from the database; earlier runs may have left some
+        self._sync_pending = True
+        # (client_id, start_time, end_time, player_name) -> local_id of the
+        # most recent saves, oldest first
+        self._recent_saves = OrderedDict()
+        self._start_sync_worker()
         
         # Check server connection
         self.check_server_connection()
@@ -72,8 +312,7 @@ class SyncGameDatabase(OriginalGameDatabase):
         # Clean the database to remove duplicates
         self.clean_database()
         
-        # We don't need a sync tracking table anymore, but we'll keep the local table
-        # structure for backwards compatibility
+        # Sync flags and the indexes the sync queries use
         self.initialize_sync_table()
         
         # Check for server reset if we're online
@@ -88,6 +327,19 @@ class SyncGameDatabase(OriginalGameDatabase):
     
     def _ensure_source_column_exists(self):
         """Make sure the game_stats table has a source column to track data origin."""
+        # Columns are only ever added, so one successful check is enough:
+        # per instance via the flag, and per database via sync_schema
+        if self._columns_checked:
+            return
+        try:
+            self.cursor.execute("SELECT version FROM sync_schema")
+            row = self.cursor.fetchone()
+            if row is not None and row[0] >= self.SYNC_SCHEMA_VERSION:
+                self._columns_checked = True
+                return
+        except sqlite3.OperationalError:
+            # No marker yet: a new database or one from an older version
+            pass
         try:
             # Check if source column exists
             self.cursor.execute("PRAGMA table_info(game_stats)")
@@ -95,68 +347,188 @@ class SyncGameDatabase(OriginalGameDatabase):
             column_names = [col[1] for col in columns]
             
             if 'source' not in column_names:
-                print("Adding 'source' column to game_stats table...")
+                log.debug("Adding 'source' column to game_stats table...")
                 self.cursor.execute('''
                     ALTER TABLE game_stats
                     ADD COLUMN source TEXT DEFAULT 'local'
                 ''')
                 self.conn.commit()
-                print("Added 'source' column successfully")
+                log.info("Added 'source' column successfully")
                 
             # Also ensure server_id column exists to track IDs from the server
             if 'server_id' not in column_names:
-                print("Adding 'server_id' column to game_stats table...")
+                log.debug("Adding 'server_id' column to game_stats table...")
                 self.cursor.execute('''
                     ALTER TABLE game_stats
                     ADD COLUMN server_id INTEGER
                 ''')
                 self.conn.commit()
-                print("Added 'server_id' column successfully")
-                
+                log.info("Added 'server_id' column successfully")
+            
+            # Sync flags live on the row itself, so saving a game is one write
+            if 'synced' not in column_names:
+                log.debug("Adding sync columns to game_stats table...")
+                self.cursor.execute('''
+                    ALTER TABLE game_stats
+                    ADD COLUMN synced INTEGER DEFAULT 0
+                ''')
+                self.cursor.execute('''
+                    ALTER TABLE game_stats
+                    ADD COLUMN last_sync_attempt REAL
+                ''')
+                # Versions without the column sent each game when it was
+                # saved, so the rows already here count as synced; otherwise
+                # the upload worker would re-send the whole local history
+                self.cursor.execute("UPDATE game_stats SET synced = 1")
+                self.conn.commit()
+                log.info("Added sync columns successfully")
+            
+            with self._txn():
+                self.cursor.execute(
+                    "CREATE TABLE IF NOT EXISTS sync_schema (version INTEGER NOT NULL)")
+                self.cursor.execute("DELETE FROM sync_schema")
+                self.cursor.execute("INSERT INTO sync_schema (version) VALUES (?)",
+                                    (self.SYNC_SCHEMA_VERSION,))
+            self._columns_checked = True
         except sqlite3.Error as e:
-            print(f"Error ensuring columns exist: {e}")
+            log.warning("Error ensuring columns exist: %s", e)
     
-    def check_server_connection(self):
-        """Check if the server is available."""
+    def check_server_connection(self, force: bool = False, wait: bool = True):
+        """
+        Check if the server is available.
+        
+        The result is reused for CONNECTION_CHECK_TTL seconds so repeated
+        calls don't each wait on a probe; pass force=True to probe anyway.
+        With wait=False an expired result is refreshed on a pool thread and
+        the last known status is returned straight away, so UI code never
+        blocks on the network.
+        """
+        now = time.monotonic()
+        if (not force and self._last_probe is not None
+                and now - self._last_probe < self.CONNECTION_CHECK_TTL):
+            return self.online
+        probed_before = self._last_probe is not None
+        self._last_probe = now
+        if not wait and probed_before:
+            self._get_http_pool().submit(self._probe_server)
+            return self.online
+        return self._probe_server()
+    
+    def _note_reachable(self, online: bool) -> None:
+        """
+        Record what a real request found out about the server.
+        
+        This counts as a fresh connection check, so the next
+        check_server_connection() within the TTL needn't probe again.
+        """
+        self.online = online
+        self._last_probe = time.monotonic()
+    
+    def _probe_server(self) -> bool:
+        """Probe the server now and update self.online."""
         try:
-            print(f"Checking server connection to: {self.server_url}")
-            # Ensure we're connecting to the base URL
+            log.debug("Checking server connection to: %s", self.server_url)
+            # The normalized server URL is the root page
             url = self.server_url
-            if not url.endswith('/'):
-                url += '/'
                 
-            response = requests.get(url, timeout=5)
-            self.online = response.status_code == 200
-            print(f"Server connection: {'Online' if self.online else 'Offline'} (Status code: {response.status_code})")
+            # HEAD the health endpoint so the server sends no body; servers
+            # without it get HEAD (or GET where HEAD is refused) of the root
+            response = self.http.head(self._health_url, timeout=self.PROBE_TIMEOUT,
+                                      allow_redirects=False)
+            if response.status_code == 404:
+                response = self.http.head(url, timeout=self.PROBE_TIMEOUT, allow_redirects=False)
+            if response.status_code == 405:
+                response = self.http.get(url, timeout=self.PROBE_TIMEOUT)
+            self.online = response.status_code in (200, 204)
+            log.info("Server connection: %s (Status code: %s)", 'Online' if self.online else 'Offline', response.status_code)
             return self.online
         except requests.exceptions.ConnectionError as e:
             self.online = False
-            print(f"Server connection failed (ConnectionError): {e}")
+            log.warning("Server connection failed (ConnectionError): %s", e)
             return False
         except requests.exceptions.Timeout as e:
             self.online = False
-            print(f"Server connection timeout: {e}")
+            log.warning("Server connection timeout: %s", e)
             return False
         except Exception as e:
             self.online = False
-            print(f"Server connection error: {e}")
+            log.warning("Server connection error: %s", e)
             return False
     
     def initialize_sync_table(self):
-        """Initialize the sync tracking table."""
+        """
+        Set up sync tracking on game_stats.
+        
+        Older databases kept the flags in a separate sync_status table; they
+        are copied onto game_stats and the table is dropped.
+        """
         try:
+            if self.table_exists("sync_status"):
+                with self._txn():
+                    self.cursor.execute('''
+                        UPDATE game_stats
+                        SET synced = 1,
+                            last_sync_attempt = (
+                                SELECT MAX(last_sync_attempt) FROM sync_status
+                                WHERE game_stats_id = game_stats.id
+                            )
+                        WHERE id IN (SELECT game_stats_id FROM sync_status WHERE synced = 1)
+                    ''')
+                    self.cursor.execute("DROP TABLE sync_status")
+                log.info("Moved sync flags from sync_status onto game_stats")
+            
+            # Indexes already there, so statistics are only gathered for new ones
+            self.cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'game_stats'")
+            existing_indexes = {row[0] for row in self.cursor.fetchall()}
+            
+            # Indexes for the sync-only lookups; player and leaderboard queries
+            # are already covered by the indexes GameDatabase creates. No query
+            # filters on difficulty alone, so drop the index older versions made
+            self.cursor.execute("DROP INDEX IF EXISTS idx_game_stats_difficulty")
+            # Cache refresh deletes server rows per difficulty
             self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS sync_status (
-                    local_id INTEGER PRIMARY KEY,
-                    game_stats_id INTEGER,
-                    synced BOOLEAN DEFAULT 0,
-                    last_sync_attempt REAL,
-                    FOREIGN KEY (game_stats_id) REFERENCES game_stats(id)
-                )
+                CREATE INDEX IF NOT EXISTS idx_game_stats_source_difficulty
+                ON game_stats(source, difficulty)
             ''')
+            # Offline leaderboard fallback: local rows, fastest first, fewest
+            # errors breaking ties, read in order with no sort step
+            self.cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_local_leaderboard
+                ON game_stats(completed, source, difficulty, duration_seconds, errors)
+            ''')
+            # Partial index holding only the local rows still waiting to be synced
+            self.cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_game_stats_unsynced
+                ON game_stats(id) WHERE synced = 0 AND source = 'local'
+            ''')
+            # Local-only player stats filter on both columns
+            self.cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_game_stats_player_source
+                ON game_stats(player_name, source)
+            ''')
+            # Each server record is cached at most once; the first time, drop
+            # any copies older versions left behind so the index can be built
+            if "idx_game_stats_server_id" not in existing_indexes:
+                with self._txn():
+                    self.cursor.execute('''
+                        DELETE FROM game_stats
+                        WHERE server_id IS NOT NULL AND id NOT IN (
+                            SELECT MIN(id) FROM game_stats
+                            WHERE server_id IS NOT NULL GROUP BY server_id
+                        )
+                    ''')
+                    self.cursor.execute('''
+                        CREATE UNIQUE INDEX idx_game_stats_server_id
+                        ON game_stats(server_id) WHERE server_id IS NOT NULL
+                    ''')
+            # Give the planner statistics for new indexes straight away; after
+            # that, the PRAGMA optimize runs keep them current
+            if not existing_indexes.issuperset(self.SYNC_INDEXES):
+                self.cursor.execute("ANALYZE game_stats")
             self.conn.commit()
         except sqlite3.Error as e:
-            print(f"Error initializing sync table: {e}")
+            log.warning("Error initializing sync table: %s", e)
     
     def save_game_stats(self, 
                        player_name: str,
@@ -167,208 +539,551 @@ class SyncGameDatabase(OriginalGameDatabase):
                        matches: int,
                        completed: bool = True) -> int:
         """
-        Save game statistics locally and directly to the server (no queuing).
+        Save game statistics locally and queue them for upload to the server.
         Always marks local records with source='local' for proper tracking.
+        Saving the same game again returns the ID of the earlier save.
         """
+        key = (self.client_id, start_time, end_time, player_name)
+        if key in self._recent_saves:
+            self._recent_saves.move_to_end(key)
+            log.debug("Game for %s already saved, skipping", player_name)
+            return self._recent_saves[key]
+        
         # First save to local DB with explicit source tag
         try:
-            errors = max(0, moves - matches)
-            duration = end_time - start_time
+            row = self._game_stats_row(
+                player_name, difficulty, start_time, end_time, moves, matches, completed
+            )
             
-            self.cursor.execute('''
-                INSERT INTO game_stats (
-                    player_name, difficulty, start_time, end_time, 
-                    duration_seconds, moves, matches, errors, completed, source
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 'local')
-            ''', (player_name, difficulty, start_time, end_time, 
-                 duration, moves, matches, errors, completed))
-            
-            local_id = self.cursor.lastrowid
-            self.conn.commit()
+            with self._txn():
+                self.cursor.execute(self.INSERT_LOCAL_GAME_SQL, row)
+                local_id = self.cursor.lastrowid
+            self._maybe_optimize()
             
         except sqlite3.Error as e:
-            print(f"Error saving game stats to local DB: {e}")
+            log.warning("Error saving game stats to local DB: %s", e)
             return -1
 
-        # If we're online, try to save to the server with retry logic
-        if self.online or self.check_server_connection():
-            # Prepare the data for the server (outside the retry loop to avoid recomputing)
-            stats_data = {
-                "client_id": CLIENT_ID,
-                "player_name": player_name,
-                "difficulty": difficulty,
-                "start_time": start_time,
-                "end_time": end_time,
-                "duration_seconds": end_time - start_time,
-                "moves": moves,
-                "matches": matches,
-                "errors": max(0, moves - matches),
-                "completed": completed,
-                "local_id": local_id  # Include local_id to help prevent duplicates
-            }
+        self._queue_upload(local_id, row)
+        self._remember_save(key, local_id)
+        
+        # Return the local ID regardless of server save success
+        return local_id
+    
+    def save_game_stats_many(self, stats_rows) -> int:
+        """
+        Save several games locally in one transaction and queue them all for
+        upload, e.g. when catching up on games played offline.
+        Games that were already saved are skipped, as in save_game_stats.
+        
+        Args:
+            stats_rows: Iterable of dictionaries with the same keys as the
+                        arguments of save_game_stats (completed is optional)
             
-            # Retry parameters
-            max_retries = 5
-            base_delay = 1  # Initial delay in seconds
+        Returns:
+            Number of records inserted, or -1 on error
+        """
+        saved = []
+        try:
+            batch_keys = set()
+            with self._txn():
+                for stats in stats_rows:
+                    row = self._game_stats_row(**stats)
+                    key = (self.client_id, row[2], row[3], row[0])
+                    if key in self._recent_saves or key in batch_keys:
+                        continue
+                    batch_keys.add(key)
+                    # One execute per game rather than executemany, which
+                    # doesn't report the row IDs the uploads need
+                    self.cursor.execute(self.INSERT_LOCAL_GAME_SQL, row)
+                    saved.append((key, self.cursor.lastrowid, row))
+            self._maybe_optimize(len(saved))
             
-            for attempt in range(1, max_retries + 1):
+        except sqlite3.Error as e:
+            log.warning("Error saving game stats to local DB: %s", e)
+            return -1
+        
+        for key, local_id, row in saved:
+            self._queue_upload(local_id, row)
+            self._remember_save(key, local_id)
+        return len(saved)
+    
+    def _queue_upload(self, local_id: int, row: tuple) -> None:
+        """
+        Hand a saved game to the upload worker so the caller never waits on
+        the network.
+        
+        Args:
+            local_id: ID of the saved record
+            row: The INSERT parameters from _game_stats_row
+        """
+        (player_name, difficulty, start_time, end_time,
+         duration, moves, matches, errors, completed) = row
+        stats_data = {
+            "client_id": self.client_id,
+            "player_name": player_name,
+            "difficulty": difficulty,
+            "start_time": start_time,
+            "end_time": end_time,
+            "duration_seconds": duration,
+            "moves": moves,
+            "matches": matches,
+            "errors": errors,
+            "completed": completed,
+            "local_id": local_id  # Include local_id to help prevent duplicates
+        }
+        try:
+            self._out_q.put_nowait(stats_data)
+        except queue.Full:
+            # The row keeps synced = 0; the worker sends it with the other
+            # pending games later
+            self._sync_pending = True
+            log.warning("Upload queue full, game %s stays local for now", local_id)
+    
+    def _remember_save(self, key: tuple, local_id: int) -> None:
+        """Record a save so repeating it returns local_id, keeping the newest few."""
+        self._recent_saves[key] = local_id
+        if len(self._recent_saves) > self.RECENT_SAVES_MAX:
+            self._recent_saves.popitem(last=False)
+    
+    @contextmanager
+    def _txn(self):
+        """
+        Run the enclosed writes in one BEGIN IMMEDIATE ... COMMIT transaction.
+        
+        Nested uses join the outer transaction, so a caller can wrap several
+        saves in a single _txn() and pay for one commit.
+        """
+        if self.conn.in_transaction:
+            yield
+            return
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.conn.rollback()
+            raise
+        self.conn.execute("COMMIT")
+    
+    def _start_sync_worker(self):
+        """Start the daemon thread that uploads saved games to the server."""
+        self._out_q = queue.Queue(maxsize=self.OUT_Q_MAX)
+        self._worker = threading.Thread(target=self._drain_out_q,
+                                        name="stats-upload", daemon=True)
+        self._worker.start()
+        # Give pending uploads a chance to go out when the game exits
+        atexit.register(self.stop_sync_worker)
+    
+    def stop_sync_worker(self, timeout: float = 10.0) -> None:
+        """
+        Stop the upload worker after it has sent everything queued so far.
+        
+        Args:
+            timeout: Maximum number of seconds to wait for pending uploads
+        """
+        if self._worker.is_alive():
+            try:
+                self._out_q.put(None, timeout=timeout)
+            except queue.Full:
+                log.warning("Upload queue still full, not waiting for the worker")
+                return
+            self._worker.join(timeout)
+    
+    def close(self) -> None:
+        """Finish pending uploads, then release the HTTP and database resources."""
+        self.stop_sync_worker()
+        # The worker is gone, so the exit hook would only keep this instance alive
+        atexit.unregister(self.stop_sync_worker)
+        if self._http_pool is not None:
+            self._http_pool.shutdown(wait=False)
+            self._http_pool = None
+        self.http.close()
+        super().close()
+    
+    def _drain_out_q(self):
+        """Worker loop: upload queued game stats until the None sentinel arrives."""
+        # sqlite3 connections belong to the thread that opened them, so the
+        # worker flags uploaded games through its own; opened on first use
+        self._worker_conn = None
+        stopping = False
+        while not stopping:
+            batch = [self._out_q.get()]
+            # Give games saved in quick succession a moment to join the batch
+            deadline = time.monotonic() + self.BULK_WAIT
+            while batch[-1] is not None and len(batch) < self.BULK_MAX:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
                 try:
-                    # Construct server URL
-                    base_url = self.server_url.rstrip('/')
-                    url = f"{base_url}/api/stats/save"
-                    
-                    if attempt > 1:
-                        print(f"Retry attempt {attempt}/{max_retries} for saving game stats")
-                    else:
-                        print(f"Directly saving game stats to server: {url}")
-                    
-                    # Send data to server
-                    response = requests.post(
-                        url,
-                        json=stats_data,
-                        timeout=10 + (attempt * 5)  # Increasing timeout with each retry
-                    )
-                    
-                    # Handle server response
-                    if response.status_code == 200:
-                        print(f"Successfully saved game stats to server for player {player_name}")
-                        # No need to refresh data automatically, it will be refreshed when 
-                        # the stats page is opened
-                        return local_id
-                    
-                    # Special handling for specific error codes
-                    elif response.status_code == 409:  # Conflict - stat may already exist
-                        print(f"Game stat already exists on server (conflict response)")
-                        return local_id
-                    else:
-                        print(f"Attempt {attempt}: Failed to save game stats to server: {response.status_code}")
-                        # Only retry on 5xx server errors or specific 4xx errors that might be temporary
-                        if response.status_code < 500 and response.status_code != 429:  # Not a server error or rate limit
-                            print(f"Non-retriable error code {response.status_code}, abandoning retry")
-                            break
+                    batch.append(self._out_q.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            if batch[-1] is None:
+                stopping = True
+                batch.pop()
+            taken = len(batch) + stopping
+            catch_up = any(stats_data is self._SYNC_PENDING for stats_data in batch)
+            batch = [stats_data for stats_data in batch
+                     if stats_data is not self._SYNC_PENDING]
+            try:
+                # Only upload while the server is reachable, as before
+                if (batch or catch_up) and (self.online or self.check_server_connection()):
+                    # After a failed upload the server has just had its
+                    # retries; the pending games wait for the next wake-up
+                    complete = not batch or self._upload_and_mark(batch) == len(batch)
+                    if complete and self._sync_pending and not stopping and self._out_q.empty():
+                        self._upload_pending()
+                elif batch:
+                    # The rows keep synced = 0 and go out with the pending
+                    # games once the server is back
+                    self._sync_pending = True
+                    log.info("Server offline, game stats %s stay local for now",
+                             [stats_data["local_id"] for stats_data in batch])
+            except Exception as e:
+                # Whatever wasn't flagged as synced goes out with the pending games
+                self._sync_pending = True
+                log.warning("Error uploading game stats: %s", e)
+            finally:
+                for _ in range(taken):
+                    self._out_q.task_done()
+        
+        if self._worker_conn is not None:
+            self._worker_conn.close()
+            self._worker_conn = None
+    
+    def _upload_batch(self, batch: List[Dict[str, Any]]) -> List[int]:
+        """
+        Upload queued stats in one bulk request, or one by one if needed.
+        
+        Returns:
+            Local IDs of the games the server now has
+        """
+        if len(batch) > 1 and self._bulk_supported:
+            response = self._post_with_retry(
+                self._save_bulk_url, {"client_id": self.client_id, "items": batch},
+                f"{len(batch)} game stats", compress=True)
+            if response is not None and response.status_code == 200:
+                accepted = self._bulk_accepted_ids(
+                    [stats_data["local_id"] for stats_data in batch], response)
+                log.info("Successfully saved %s game stats to server in one request", len(accepted))
+                return accepted
+            if response is not None and response.status_code == 404:
+                # Older server without the bulk endpoint
+                log.info("Server has no bulk save endpoint, sending stats one at a time")
+                self._bulk_supported = False
+            else:
+                return []
+        
+        return [stats_data["local_id"] for stats_data in batch
+                if self._post_game_stats(stats_data)]
+    
+    def _bulk_accepted_ids(self, local_ids: List[int], response) -> List[int]:
+        """
+        Local IDs from a bulk upload that the server stored or already had.
+        
+        Items the server lists as invalid are logged and left out, so they
+        keep synced = 0 instead of being marked as synced.
+        
+        Args:
+            local_ids: Local IDs in the order the items were sent
+            response: The server's 200 response to the bulk request
+        """
+        try:
+            invalid = _json_loads(response.content).get("invalid") or []
+        except (ValueError, AttributeError):
+            # A 200 without a readable body still means the batch was stored
+            return local_ids
+        rejected = set()
+        for entry in invalid:
+            index = entry.get("index")
+            if isinstance(index, int) and 0 <= index < len(local_ids):
+                rejected.add(index)
+                log.warning("Server rejected game stat ID %s: %s",
+                            local_ids[index], entry.get("error"))
+        return [local_id for index, local_id in enumerate(local_ids)
+                if index not in rejected]
+    
+    def _worker_db(self) -> sqlite3.Connection:
+        """The upload worker's own database connection, opened on first use."""
+        if self._worker_conn is None:
+            self._worker_conn = sqlite3.connect(self.db_file, isolation_level=None)
+            self._worker_conn.row_factory = sqlite3.Row
+            for pragma in self.PRAGMAS:
+                self._worker_conn.execute(pragma)
+        return self._worker_conn
+    
+    def _upload_pending(self) -> None:
+        """Upload the games that never reached the server, BULK_MAX at a time."""
+        self._sync_pending = False
+        after = 0
+        while True:
+            try:
+                rows = self._worker_db().execute(
+                    self.PENDING_SELECT_SQL, (after, self.BULK_MAX)).fetchall()
+            except sqlite3.Error as e:
+                log.warning("Error reading pending game stats: %s", e)
+                self._sync_pending = True
+                return
+            if not rows:
+                return
+            after = rows[-1]["local_id"]
+            log.info("Uploading %s game stats saved while they couldn't be sent", len(rows))
+            accepted = self._upload_and_mark([
+                {"client_id": self.client_id, **dict(row), "completed": bool(row["completed"])}
+                for row in rows
+            ])
+            if not self.online or not accepted:
+                # Lost the server again, or it is failing; try the rest next time
+                self._sync_pending = True
+                return
+    
+    def _upload_and_mark(self, batch: List[Dict[str, Any]]) -> int:
+        """
+        Upload stats and flag the games the server now has as synced.
+        
+        Games left out keep synced = 0 and are marked as pending, so a later
+        force_sync_all sends them again.
+        
+        Returns:
+            Number of games the server accepted
+        """
+        local_ids = self._upload_batch(batch)
+        self._mark_uploaded(local_ids)
+        if len(local_ids) < len(batch):
+            self._sync_pending = True
+        return len(local_ids)
+    
+    def _mark_uploaded(self, local_ids: List[int]) -> None:
+        """Flag games uploaded by the worker as synced, on the worker's connection."""
+        if not local_ids:
+            return
+        conn = self._worker_db()
+        now = time.time()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                self.MARK_SYNCED_SQL, [(now, local_id) for local_id in local_ids])
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.rollback()
+            log.warning("Error flagging uploaded game stats as synced: %s", e)
+    
+    def _post_game_stats(self, stats_data: Dict[str, Any]) -> bool:
+        """
+        Send one game's stats to the server, retrying transient failures.
+        
+        Returns:
+            True if the server stored the stats (or already had them)
+        """
+        response = self._post_with_retry(self._save_url, stats_data, "game stats")
+        if response is None:
+            return False
+        
+        # Handle server response
+        if response.status_code == 200:
+            log.info("Successfully saved game stats to server for player %s", stats_data['player_name'])
+            # No need to refresh data automatically, it will be refreshed when 
+            # the stats page is opened
+            return True
+        
+        # Special handling for specific error codes
+        elif response.status_code == 409:  # Conflict - stat may already exist
+            log.debug("Game stat already exists on server (conflict response)")
+            return True
+        return False
+    
+    def _post_with_retry(self, url: str, payload: Any, description: str,
+                         compress: bool = False):
+        """
+        POST a payload to the server, retrying transient failures.
+        
+        Args:
+            url: Endpoint URL
+            payload: JSON-serializable request body
+            description: What is being saved, for log messages
+            compress: Whether a large body may be gzipped; only the bulk
+                      endpoint accepts compressed bodies
+            
+        Returns:
+            The final response (success or non-retriable error), or None if
+            every attempt failed
+        """
+        # Retry parameters
+        max_retries = 5
+        base_delay = 1  # Initial delay in seconds
+        body, headers = _encode_json_body(payload, compress)
+        
+        for attempt in range(1, max_retries + 1):
+            try:
+                if attempt > 1:
+                    log.debug("Retry attempt %s/%s for saving %s", attempt, max_retries, description)
+                else:
+                    log.debug("Saving %s to server: %s", description, url)
+                
+                # Send data to server
+                response = self.http.post(
+                    url,
+                    data=body,
+                    headers=headers,
+                    timeout=10 + (attempt * 5)  # Increasing timeout with each retry
+                )
+                self._note_reachable(True)
                 
-                except requests.exceptions.RequestException as e:
-                    print(f"Attempt {attempt}: Network error saving game stats: {e}")
+                if response.status_code in (200, 409):
+                    if response.status_code == 200:
+                        self._invalidate_cache()
+                    return response
                 
-                # Don't sleep after the last attempt
-                if attempt < max_retries:
-                    # Exponential backoff with jitter to avoid thundering herd
-                    delay = base_delay * (2 ** (attempt - 1)) * (0.5 + random.random())
-                    print(f"Waiting {delay:.2f}s before retry...")
-                    time.sleep(delay)
+                log.warning("Attempt %s: Failed to save %s to server: %s", attempt, description, response.status_code)
+                # Only retry on 5xx server errors or specific 4xx errors that might be temporary
+                if response.status_code < 500 and response.status_code != 429:  # Not a server error or rate limit
+                    log.warning("Non-retriable error code %s, abandoning retry", response.status_code)
+                    return response
+            
+            except requests.exceptions.RequestException as e:
+                log.warning("Attempt %s: Network error saving %s: %s", attempt, description, e)
+                if isinstance(e, requests.exceptions.ConnectionError):
+                    self._note_reachable(False)
             
-            print(f"Failed to save game stats to server after {max_retries} attempts")
+            # Don't sleep after the last attempt
+            if attempt < max_retries:
+                # Exponential backoff with jitter to avoid thundering herd
+                delay = base_delay * (2 ** (attempt - 1)) * (0.5 + random.random())
+                log.debug("Waiting %.2fs before retry...", delay)
+                time.sleep(delay)
         
-        # Return the local ID regardless of server save success
-        return local_id
+        log.warning("Failed to save %s to server after %s attempts", description, max_retries)
+        return None
+    
+    def _maybe_optimize(self, saves: int = 1):
+        """Let SQLite refresh its query planner statistics every few saves."""
+        self._saves_since_optimize += saves
+        if self._saves_since_optimize >= self.OPTIMIZE_EVERY:
+            self._saves_since_optimize = 0
+            self.cursor.execute("PRAGMA optimize")
     
     def sync_game_stat(self, game_stats_id: int) -> bool:
         """
         Sync a specific game stat to the server.
         Returns True if sync was successful.
         """
-        try:
-            # Get the stat from local DB
-            self.cursor.execute('''
-                SELECT player_name, difficulty, start_time, end_time, 
-                       duration_seconds, moves, matches, errors, completed
-                FROM game_stats
-                WHERE id = ?
-            ''', (game_stats_id,))
+        return self.sync_game_stats([game_stats_id]) == 1
+    
+    def sync_game_stats(self, game_stats_ids: List[int], commit: bool = True) -> int:
+        """
+        Sync several game stats to the server.
+        
+        The rows are read with one SELECT and their sync flags updated with
+        one executemany in a single transaction, BULK_MAX games at a time.
+        
+        Args:
+            game_stats_ids: IDs of the local game_stats rows to send
+            commit: Whether to commit the sync flags right away; pass False
+                    to fold them into a transaction you commit yourself
             
-            row = self.cursor.fetchone()
-            if not row:
-                print(f"Game stat ID {game_stats_id} not found in local DB")
-                return False
+        Returns:
+            Number of stats successfully synced
+        """
+        if not game_stats_ids:
+            return 0
+        if len(game_stats_ids) > self.BULK_MAX:
+            # Keep each request body, and the server's transaction, bounded
+            return sum(self.sync_game_stats(game_stats_ids[i:i + self.BULK_MAX], commit)
+                       for i in range(0, len(game_stats_ids), self.BULK_MAX))
+        try:
+            # Get the stats from local DB
+            placeholders = ','.join('?' * len(game_stats_ids))
+            self.cursor.execute(self.SYNC_SELECT_SQL.format(placeholders), list(game_stats_ids))
+            rows = self.cursor.fetchall()
+        except sqlite3.Error as e:
+            log.warning("Error syncing game stat: %s", e)
+            return 0
+        
+        found_ids = {row["local_id"] for row in rows}
+        for game_stats_id in game_stats_ids:
+            if game_stats_id not in found_ids:
+                log.warning("Game stat ID %s not found in local DB", game_stats_id)
+        return self._sync_rows(rows, commit)
+    
+    def _sync_rows(self, rows, commit: bool = True) -> int:
+        """
+        Send already loaded game_stats rows to the server and flag the ones it took.
+        
+        Args:
+            rows: Rows selected with the SYNC_SELECT_SQL columns
+            commit: As for sync_game_stats
             
-            # Prepare data for server
-            stats_data = {
-                "client_id": CLIENT_ID,
-                "player_name": row[0],
-                "difficulty": row[1],
-                "start_time": row[2],
-                "end_time": row[3],
-                "duration_seconds": row[4],
-                "moves": row[5],
-                "matches": row[6],
-                "errors": row[7],
-                "completed": bool(row[8])
+        Returns:
+            Number of stats successfully synced
+        """
+        if not rows:
+            return 0
+        try:
+            # Prepare data for server; local_id lets it spot repeated uploads
+            payloads = {
+                row["local_id"]: {"client_id": self.client_id, **dict(row),
+                                  "completed": bool(row["completed"])}
+                for row in rows
             }
             
             # Debug info
-            print(f"Attempting to sync to server: {self.server_url}")
-            print(f"Sync data: {stats_data}")
-            
-            # Send to server
-            # Construct API endpoint correctly, ensuring no double slashes
-            base_url = self.server_url.rstrip('/')
-            url = f"{base_url}/api/stats/save"
-            print(f"Sending data to: {url}")
-            
-            response = requests.post(
-                url,
-                json=stats_data,
-                timeout=10  # Increase timeout for slower connections
-            )
+            log.debug("Attempting to sync %s game stats to server: %s", len(payloads), self.server_url)
             
-            print(f"Server response: Status {response.status_code}")
-            print(f"Response content: {response.text}")
+            synced_ids = []
+            if len(payloads) > 1 and self._bulk_supported:
+                response = self._post_with_retry(
+                    self._save_bulk_url,
+                    {"client_id": self.client_id, "items": list(payloads.values())},
+                    f"{len(payloads)} game stats", compress=True)
+                if response is not None and response.status_code == 200:
+                    synced_ids = self._bulk_accepted_ids(list(payloads), response)
+                elif response is not None and response.status_code == 404:
+                    # Older server without the bulk endpoint
+                    self._bulk_supported = False
+            
+            if not synced_ids and (len(payloads) == 1 or not self._bulk_supported):
+                # Send to server one by one; _post_game_stats handles network
+                # errors itself, so a failure on one game still leaves the
+                # games already accepted to be flagged below
+                for game_stats_id, stats_data in payloads.items():
+                    log.debug("Sync data: %s", stats_data)
+                    if self._post_game_stats(stats_data):
+                        synced_ids.append(game_stats_id)
+                    else:
+                        log.warning("Failed to sync game stat ID %s", game_stats_id)
+                        if not self.online:
+                            # Server unreachable; the rest stay synced = 0
+                            break
             
             # Update sync status
-            if response.status_code == 200:
-                self.cursor.execute('''
-                    UPDATE sync_status
-                    SET synced = 1, last_sync_attempt = ?
-                    WHERE game_stats_id = ?
-                ''', (time.time(), game_stats_id))
-                self.conn.commit()
-                print(f"Successfully synced game stat ID {game_stats_id}")
-                return True
-            else:
-                print(f"Failed to sync game stat ID {game_stats_id}: {response.text}")
-                return False
+            if synced_ids:
+                self._mark_synced(synced_ids, commit)
+                log.info("Successfully synced game stat IDs %s", synced_ids)
+            return len(synced_ids)
                 
         except Exception as e:
-            print(f"Error syncing game stat: {e}")
-            return False
+            log.warning("Error syncing game stat: %s", e)
+            return 0
     
-    def background_sync(self):
-        """Background thread that periodically syncs data to the server."""
-        while True:
-            try:
-                # Check if we're online
-                if not self.check_server_connection():
-                    # Sleep longer if offline
-                    time.sleep(30)
-                    continue
-                
-                # Get items to sync
-                self.cursor.execute('''
-                    SELECT game_stats_id
-                    FROM sync_status
-                    WHERE synced = 0
-                    LIMIT 10
-                ''')
-                
-                items = self.cursor.fetchall()
-                
-                if items:
-                    print(f"Found {len(items)} items to sync")
-                    
-                    for item in items:
-                        game_stats_id = item[0]
-                        success = self.sync_game_stat(game_stats_id)
-                        
-                        # If failed, don't hammer the server
-                        if not success:
-                            time.sleep(2)
-                
-                # Sleep between sync attempts
-                time.sleep(60)  # Check every minute
-                
-            except Exception as e:
-                print(f"Error in sync thread: {e}")
-                time.sleep(120)  # Wait longer after an error
+    def _mark_synced(self, game_stats_ids: List[int], commit: bool = True) -> None:
+        """
+        Flag game stats as synced with one executemany.
+        
+        Args:
+            game_stats_ids: IDs of the local game_stats rows the server accepted
+            commit: Whether to commit right away; with False the transaction
+                    is left open for the caller to commit
+        """
+        self._invalidate_cache()
+        now = time.time()
+        if not commit and not self.conn.in_transaction:
+            self.cursor.execute("BEGIN IMMEDIATE")
+        with self._txn():
+            self.cursor.executemany(
+                self.MARK_SYNCED_SQL,
+                [(now, game_stats_id) for game_stats_id in game_stats_ids])
     
     def get_leaderboard(self, difficulty: Optional[str] = None, 
                        limit: int = 10) -> List[Dict[str, Any]]:
@@ -385,7 +1100,7 @@ class SyncGameDatabase(OriginalGameDatabase):
             List of dictionaries containing top game stats
         """
         # When online, directly call the remote method which already handles fallback
-        if self.online or self.check_server_connection():
+        if self.online or self.check_server_connection(wait=False):
             return self.get_remote_leaderboard(difficulty, limit)
         
         # When completely offline and not in remote mode, use the traditional method
@@ -394,35 +1109,20 @@ class SyncGameDatabase(OriginalGameDatabase):
                 self.initialize_db()
             
             # Use explicit SQL ordering to ensure correct results
-            query = '''
-                SELECT id, player_name, difficulty, start_time, end_time, 
-                       duration_seconds, errors, source
-                FROM game_stats 
-                WHERE completed = 1
-            '''
-            
-            params = []
             if difficulty:
-                query += " AND difficulty = ?"
-                params.append(difficulty)
-            
-            # For local data, explicitly filter to only include local source
-            query += " AND source = 'local'"
-                
-            # Explicitly order first by time ascending, then by errors ascending
-            query += " ORDER BY duration_seconds ASC, errors ASC LIMIT ?"
-            params.append(limit)
+                query, params = self.LOCAL_LEADERBOARD_DIFFICULTY_SQL, (difficulty, limit)
+            else:
+                query, params = self.LOCAL_LEADERBOARD_SQL, (limit,)
             
             # Debug the actual query being executed
-            print(f"OFFLINE MODE: Executing local-only leaderboard query: {query} with params {params}")
+            log.debug("OFFLINE MODE: Executing local-only leaderboard query: %s with params %s", query, params)
             
             self.cursor.execute(query, params)
-            results = [dict(zip([col[0] for col in self.cursor.description], row)) 
-                      for row in self.cursor.fetchall()]
+            results = [dict(row) for row in self.cursor]
             
             return results
         except sqlite3.Error as e:
-            print(f"Error retrieving leaderboard: {e}")
+            log.warning("Error retrieving leaderboard: %s", e)
             return []
 
     def get_remote_leaderboard(self, difficulty: Optional[str] = None, 
@@ -435,170 +1135,111 @@ class SyncGameDatabase(OriginalGameDatabase):
         # Reset cached data flag
         self.using_cached_data = False
         
-        # Always check server connection
-        self.check_server_connection()
+        # Refresh the connection status without blocking on it
+        self.check_server_connection(wait=False)
+        
+        return self._remote_leaderboard_result(
+            difficulty, limit, lambda: self._request_leaderboard(difficulty, limit))
+    
+    def _request_leaderboard(self, difficulty: Optional[str], limit: int, timeout: float = 5,
+                             per_difficulty: bool = False):
+        """Send the leaderboard GET; network only, safe to run on a pool thread."""
+        url = self._leaderboard_url % (difficulty if difficulty else "all")
+        
+        log.debug("Fetching leaderboard from: %s", url)
+        
+        # No cache-busting parameter: the session's no-cache headers make
+        # caches revalidate, and If-None-Match lets the server answer 304
+        params = {"limit": limit}
+        headers = None
+        if per_difficulty:
+            # Top `limit` of every difficulty in one response
+            params["per_difficulty"] = 1
+        else:
+            headers = self._conditional_headers(("leaderboard", difficulty, limit))
+        
+        return self.http.get(url, params=params, headers=headers, timeout=timeout)
+    
+    def _remote_leaderboard_result(self, difficulty, limit, fetch):
+        """
+        Turn a leaderboard response into results, falling back to local data.
         
+        Args:
+            difficulty: Game difficulty or None for all
+            limit: Maximum number of records to return
+            fetch: Callable returning the server response (or raising)
+        """
         if not self.online:
-            print("Cannot get remote leaderboard: Server is offline")
+            log.warning("Cannot get remote leaderboard: Server is offline")
             # Use cached data only as fallback with clear indicator
-            print("Using local-only leaderboard data (server offline)")
-            self.using_cached_data = True
-            
-            # Get local data with source filter
-            try:
-                query = '''
-                    SELECT id, player_name, difficulty, start_time, end_time, 
-                           duration_seconds, errors, source
-                    FROM game_stats 
-                    WHERE completed = 1
-                '''
-                
-                params = []
-                if difficulty:
-                    query += " AND difficulty = ?"
-                    params.append(difficulty)
-                
-                # Only show local data in offline mode
-                query += " AND source = 'local'"
-                
-                query += " ORDER BY duration_seconds ASC, errors ASC LIMIT ?"
-                params.append(limit)
-                
-                print(f"OFFLINE FALLBACK: Executing local-only query: {query}")
-                
-                self.cursor.execute(query, params)
-                local_data = [dict(zip([col[0] for col in self.cursor.description], row)) 
-                             for row in self.cursor.fetchall()]
-                
-                # Add very clear cached indicator
-                for item in local_data:
-                    item["cached"] = True
-                    item["warning"] = "LOCAL DATA ONLY - Not synced with server"
-                
-                return local_data
-            except Exception as e:
-                print(f"Error getting local fallback data: {e}")
-                return []
+            log.info("Using local-only leaderboard data (server offline)")
+            return self._local_fallback_leaderboard(
+                difficulty, limit, "LOCAL DATA ONLY - Not synced with server")
         
         try:
-            # Try to get remote leaderboard with cache busting parameter
-            difficulty_param = difficulty if difficulty else "all"
-            
-            # Construct API endpoint correctly, ensuring no double slashes
-            base_url = self.server_url.rstrip('/')
-            url = f"{base_url}/api/stats/leaderboard/{difficulty_param}"
+            cache_key = ("leaderboard", difficulty, limit)
+            data = self._cache_get(cache_key)
+            if data is not None:
+                # Copies, so callers can't change what later hits return
+                return [dict(record) for record in data.get("leaderboard", [])]
             
-            # Add cache busting parameter to prevent browser/request caching
-            cache_buster = int(time.time() * 1000)  # Use milliseconds for more uniqueness
+            # Get the remote leaderboard, revalidated with If-None-Match
+            response = fetch()
             
-            print(f"Fetching fresh leaderboard from: {url}?t={cache_buster}")
+            log.debug("Leaderboard response status: %s", response.status_code)
             
-            # Disable all caching mechanisms
-            headers = {
-                'Cache-Control': 'no-cache, no-store, must-revalidate',
-                'Pragma': 'no-cache',
-                'Expires': '0'
-            }
-            
-            response = requests.get(
-                url, 
-                params={
-                    "limit": limit,
-                    "t": cache_buster  # Cache busting parameter
-                }, 
-                headers=headers,
-                timeout=5
-            )
-            
-            print(f"Leaderboard response status: {response.status_code}")
-            
-            if response.status_code == 200:
-                data = response.json()
+            data = self._response_body(cache_key, response)
+            if data is not None:
+                self._note_reachable(True)
                 leaderboard = data.get("leaderboard", [])
                 
                 # No longer update local cache from server data automatically
                 # This prevents data duplication
                 # self._update_local_cache_from_server(leaderboard)
                 
-                # Use the actual server data directly
-                return leaderboard
+                # Use the actual server data directly, copied as for a cache hit
+                return [dict(record) for record in leaderboard]
             else:
-                print(f"Error getting remote leaderboard: {response.status_code}")
+                log.warning("Error getting remote leaderboard: %s", response.status_code)
                 # Fallback to cached data with warning, using only local source
-                print("Using local-only leaderboard data (server error)")
-                self.using_cached_data = True
-                
-                try:
-                    query = '''
-                        SELECT id, player_name, difficulty, start_time, end_time, 
-                               duration_seconds, errors, source
-                        FROM game_stats 
-                        WHERE completed = 1
-                    '''
-                    
-                    params = []
-                    if difficulty:
-                        query += " AND difficulty = ?"
-                        params.append(difficulty)
-                    
-                    # Only show local data when server unavailable
-                    query += " AND source = 'local'"
-                    
-                    query += " ORDER BY duration_seconds ASC, errors ASC LIMIT ?"
-                    params.append(limit)
-                    
-                    self.cursor.execute(query, params)
-                    local_data = [dict(zip([col[0] for col in self.cursor.description], row)) 
-                                 for row in self.cursor.fetchall()]
-                    
-                    # Add very clear cached indicator
-                    for item in local_data:
-                        item["cached"] = True
-                        item["warning"] = f"LOCAL DATA ONLY - Server error {response.status_code}"
-                    
-                    return local_data
-                except Exception as inner_e:
-                    print(f"Error getting local fallback data: {inner_e}")
-                    return []
+                log.warning("Using local-only leaderboard data (server error)")
+                return self._local_fallback_leaderboard(
+                    difficulty, limit, f"LOCAL DATA ONLY - Server error {response.status_code}")
                 
         except Exception as e:
-            print(f"Failed to get remote leaderboard: {e}")
+            log.warning("Failed to get remote leaderboard: %s", e)
+            if isinstance(e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+                self._note_reachable(False)
             # Fallback to cached data with warning
-            print("Using local-only leaderboard data (exception)")
-            self.using_cached_data = True
+            log.info("Using local-only leaderboard data (exception)")
+            return self._local_fallback_leaderboard(
+                difficulty, limit, "LOCAL DATA ONLY - Connection error")
+    
+    def _local_fallback_leaderboard(self, difficulty, limit, warning: str) -> List[Dict[str, Any]]:
+        """
+        Local-only leaderboard shown when server data is unavailable.
+        
+        Args:
+            difficulty: Game difficulty or None for all
+            limit: Maximum number of records to return
+            warning: Message attached to every record
+        """
+        self.using_cached_data = True
+        try:
+            if difficulty:
+                query, params = self.LOCAL_LEADERBOARD_DIFFICULTY_SQL, (difficulty, limit)
+            else:
+                query, params = self.LOCAL_LEADERBOARD_SQL, (limit,)
             
-            try:
-                query = '''
-                    SELECT id, player_name, difficulty, start_time, end_time, 
-                           duration_seconds, errors, source
-                    FROM game_stats 
-                    WHERE completed = 1
-                '''
-                
-                params = []
-                if difficulty:
-                    query += " AND difficulty = ?"
-                    params.append(difficulty)
-                
-                # Only show local data when server unavailable
-                query += " AND source = 'local'"
-                
-                query += " ORDER BY duration_seconds ASC, errors ASC LIMIT ?"
-                params.append(limit)
-                
-                self.cursor.execute(query, params)
-                local_data = [dict(zip([col[0] for col in self.cursor.description], row)) 
-                             for row in self.cursor.fetchall()]
-                
-                # Add very clear cached indicator
-                for item in local_data:
-                    item["cached"] = True
-                    item["warning"] = f"LOCAL DATA ONLY - Connection error"
-                
-                return local_data
-            except Exception as inner_e:
-                print(f"Error getting local fallback data: {inner_e}")
-                return []
+            log.debug("FALLBACK: Executing local-only query: %s", query)
+            self.cursor.execute(query, params)
+            
+            # Add very clear cached indicator
+            return [{**dict(row), "cached": True, "warning": warning}
+                    for row in self.cursor]
+        except Exception as e:
+            log.warning("Error getting local fallback data: %s", e)
+            return []
     
     def _refresh_server_data(self):
         """
@@ -607,58 +1248,58 @@ class SyncGameDatabase(OriginalGameDatabase):
         """
         # First check server connection to avoid unnecessary requests
         if not self.online and not self.check_server_connection():
-            print("Server is offline - skipping data refresh")
+            log.info("Server is offline - skipping data refresh")
             return False
             
         try:
-            print("Refreshing all server data...")
+            log.debug("Refreshing all server data...")
             # Fetch data for all difficulty levels
             difficulties = ["Easy", "Medium", "Hard"]
             
-            for difficulty in difficulties:
-                # Use a higher limit to ensure we get all relevant records
-                difficulty_param = difficulty if difficulty else "all"
-                
-                # Construct API endpoint correctly, ensuring no double slashes
-                base_url = self.server_url.rstrip('/')
-                url = f"{base_url}/api/stats/leaderboard/{difficulty_param}"
-                
-                # Add cache busting parameter
-                cache_buster = int(time.time() * 1000)
-                
-                print(f"Refreshing {difficulty} leaderboard from server...")
-                
-                # Strong cache-busting headers
-                headers = {
-                    'Cache-Control': 'no-cache, no-store, must-revalidate',
-                    'Pragma': 'no-cache',
-                    'Expires': '0'
-                }
+            # One round-trip for every board (limit 100 per difficulty)
+            response = self._request_leaderboard(None, 100, 10, per_difficulty=True)
+            if response.status_code == 200:
+                data = _json_loads(response.content)
+                # Older servers ignore per_difficulty and return the overall
+                # top 100, which would leave some boards short
+                if data.get("per_difficulty"):
+                    boards = defaultdict(list)
+                    for record in data.get("leaderboard", []):
+                        boards[record.get("difficulty")].append(record)
+                    for difficulty in difficulties:
+                        log.debug("Retrieved %s %s records from server",
+                                  len(boards[difficulty]), difficulty)
+                        self._update_local_cache_from_server(boards[difficulty], difficulty)
+                    return True
+            
+            # Issue the three GETs at once; the cache is still updated on this
+            # thread, since the SQLite connection belongs to it, but each
+            # difficulty as soon as its response arrives
+            # (limit 100 to get most of the relevant records)
+            pool = self._get_http_pool()
+            futures = {pool.submit(self._request_leaderboard, difficulty, 100, 10): difficulty
+                       for difficulty in difficulties}
+            
+            for future in as_completed(futures):
+                difficulty = futures[future]
+                log.debug("Refreshing %s leaderboard from server...", difficulty)
                 
-                response = requests.get(
-                    url, 
-                    params={
-                        "limit": 100,  # High limit to get most data
-                        "t": cache_buster
-                    }, 
-                    headers=headers,
-                    timeout=10
-                )
+                response = future.result()
                 
                 if response.status_code == 200:
-                    data = response.json()
+                    data = _json_loads(response.content)
                     leaderboard = data.get("leaderboard", [])
-                    print(f"Retrieved {len(leaderboard)} {difficulty} records from server")
+                    log.debug("Retrieved %s %s records from server", len(leaderboard), difficulty)
                     
                     # Update local cache from server data
                     self._update_local_cache_from_server(leaderboard, difficulty)
                 else:
-                    print(f"Failed to refresh {difficulty} data: {response.status_code}")
+                    log.warning("Failed to refresh %s data: %s", difficulty, response.status_code)
             
             return True
             
         except Exception as e:
-            print(f"Error refreshing server data: {e}")
+            log.warning("Error refreshing server data: %s", e)
             return False
             
     def _update_local_cache_from_server(self, server_data: List[Dict[str, Any]], difficulty: str = None) -> None:
@@ -672,7 +1313,43 @@ class SyncGameDatabase(OriginalGameDatabase):
         """
         if not server_data:
             return
+        
+        # Build the rows before taking the write lock
+        # Synthetic end time for the cached records
+        end_time = time.time()
+        rows = []
+        seen = set()
+        for item in server_data:
+            # Skip records without an ID and repeats of an ID already taken
+            server_id = item.get('id')
+            if server_id is None or server_id in seen:
+                continue
+            seen.add(server_id)
             
+            # Skip if missing required fields
+            if not all(k in item for k in ['player_name', 'difficulty', 'duration_seconds']):
+                continue
+                
+            # Extract fields from server data
+            player_name = item.get('player_name', 'Unknown')
+            record_difficulty = item.get('difficulty', 'Medium') 
+            duration = item.get('duration_seconds', 0)
+            errors = item.get('errors', 0)
+            
+            # Only insert if it matches our target difficulty (if specified)
+            if difficulty and record_difficulty != difficulty:
+                continue
+            
+            # Calculate moves and matches based on errors
+            # This is an approximation since we don't know actual values
+            matches = item.get('matches', 8)  # Use actual matches if available
+            moves = matches + errors
+            
+            rows.append((player_name, record_difficulty, end_time - duration, end_time,
+                         duration, moves, matches, errors, server_id))
+        
+        log.debug("Processing %s unique server records", len(rows))
+        
         try:
             # Begin transaction
             self.conn.isolation_level = 'EXCLUSIVE'
@@ -681,75 +1358,31 @@ class SyncGameDatabase(OriginalGameDatabase):
             try:
                 # Clear existing server-sourced records for this difficulty
                 if difficulty:
-                    print(f"Clearing server-sourced records for difficulty: {difficulty}")
+                    log.debug("Clearing server-sourced records for difficulty: %s", difficulty)
                     self.cursor.execute(
                         "DELETE FROM game_stats WHERE source = 'server' AND difficulty = ?", 
                         (difficulty,)
                     )
                 else:
                     # If no difficulty specified, clear all server records
-                    print("Clearing all server-sourced records")
+                    log.debug("Clearing all server-sourced records")
                     self.cursor.execute("DELETE FROM game_stats WHERE source = 'server'")
                 
-                # Then insert new records from server
-                inserted_count = 0
-                server_id_map = {}
-                
-                # First collect all IDs to avoid duplicates
-                for item in server_data:
-                    if 'id' in item:
-                        server_id_map[item['id']] = item
-                
-                print(f"Processing {len(server_id_map)} unique server records")
-                
-                # Then insert records, using server IDs to avoid duplicates
-                for server_id, item in server_id_map.items():
-                    # Skip if missing required fields
-                    if not all(k in item for k in ['player_name', 'difficulty', 'duration_seconds']):
-                        continue
-                        
-                    # Extract fields from server data
-                    player_name = item.get('player_name', 'Unknown')
-                    record_difficulty = item.get('difficulty', 'Medium') 
-                    duration = item.get('duration_seconds', 0)
-                    errors = item.get('errors', 0)
-                    
-                    # Only insert if it matches our target difficulty (if specified)
-                    if difficulty and record_difficulty != difficulty:
-                        continue
-                    
-                    # Calculate synthetic start/end times
-                    end_time = time.time()
-                    start_time = end_time - duration
-                    
-                    # Calculate moves and matches based on errors
-                    # This is an approximation since we don't know actual values
-                    matches = item.get('matches', 8)  # Use actual matches if available
-                    moves = matches + errors
-                    
-                    # Insert as server-sourced record, including the server ID
-                    self.cursor.execute('''
-                        INSERT INTO game_stats 
-                        (player_name, difficulty, start_time, end_time, 
-                         duration_seconds, moves, matches, errors, completed, source, server_id)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1, 'server', ?)
-                    ''', (player_name, record_difficulty, start_time, end_time, 
-                         duration, moves, matches, errors, server_id))
-                    
-                    inserted_count += 1
+                # Then insert the server records, including their server IDs
+                self.cursor.executemany(self.INSERT_SERVER_GAME_SQL, rows)
                 
                 # Commit changes
                 self.conn.commit()
-                print(f"Updated local cache with {inserted_count} server records for {difficulty or 'all'} difficulty")
+                log.debug("Updated local cache with %s server records for %s difficulty", len(rows), difficulty or 'all')
                 
             except Exception as inner_e:
                 # Rollback in case of error during processing
                 self.conn.rollback()
-                print(f"Error during server data processing, rolling back: {inner_e}")
+                log.warning("Error during server data processing, rolling back: %s", inner_e)
                 raise inner_e
                 
         except Exception as e:
-            print(f"Error updating local cache from server: {e}")
+            log.warning("Error updating local cache from server: %s", e)
             # Make sure transaction is ended
             try:
                 self.conn.rollback()
@@ -764,49 +1397,42 @@ class SyncGameDatabase(OriginalGameDatabase):
         Helper method to deduplicate stats by their unique game signatures.
         
         Args:
-            stats_list: List of stats dictionaries to deduplicate
+            stats_list: Stats dictionaries to deduplicate; any iterable, so
+                        records can be built one at a time as they are read
             
         Returns:
             List of deduplicated stats
         """
-        # Only debug log if there are lots of stats (likely only during startup)
-        if len(stats_list) > 5:
-            print(f"Deduplicating {len(stats_list)} stats")
-        
-        # Deduplicate based on unique game signature using server ID if available
-        unique_stats = {}
+        # Deduplicate based on unique game signature using server ID if available;
+        # keys map to the record's position in the output list
+        positions = {}
+        deduplicated_stats = []
+        orig_count = 0
         for stat in stats_list:
+            orig_count += 1
             # If we have a server ID, use that as the primary key
             if "id" in stat:
-                key = f"id_{stat['id']}"
-            # Otherwise create a unique key from game properties
+                key = ("id", stat["id"])
+            # Otherwise create a unique key from game properties (tuples hash
+            # without building strings; round() groups the same as :.2f)
             else:
-                # Use all available properties to create a truly unique key
-                key_elements = [
-                    f"p_{stat['player_name']}",
-                    f"d_{stat['difficulty']}",
-                    f"t_{float(stat['duration_seconds']):.2f}",
-                    f"e_{stat.get('errors', 0)}"
-                ]
-                key = "_".join(key_elements)
+                key = ("game", stat['player_name'], stat['difficulty'],
+                       round(float(stat['duration_seconds']), 2), stat.get('errors', 0))
             
             # If this key is already in use, decide which record to keep
-            if key in unique_stats:
-                # Prefer server data over local data
-                if stat.get('source') == 'server' and unique_stats[key].get('source') == 'local':
-                    unique_stats[key] = stat
-            else:
-                unique_stats[key] = stat
-        
-        # Create the final deduplicated list
-        deduplicated_stats = list(unique_stats.values())
+            index = positions.get(key)
+            if index is None:
+                positions[key] = len(deduplicated_stats)
+                deduplicated_stats.append(stat)
+            # Prefer server data over local data
+            elif stat.get('source') == 'server' and deduplicated_stats[index].get('source') == 'local':
+                deduplicated_stats[index] = stat
         
-        orig_count = len(stats_list)
         dedup_count = len(deduplicated_stats)
         
         # Print details about what was removed only if significant deduplication happened
         if orig_count > dedup_count and orig_count > 5:
-            print(f"Deduplicated stats: {orig_count} → {dedup_count} ({orig_count - dedup_count} removed)")
+            log.debug("Deduplicated stats: %s → %s (%s removed)", orig_count, dedup_count, orig_count - dedup_count)
             
         # Return the deduplicated list
         return deduplicated_stats
@@ -835,19 +1461,13 @@ class SyncGameDatabase(OriginalGameDatabase):
                 ORDER BY start_time DESC
             ''', (player_name,))
             
-            all_stats = self.cursor.fetchall()
-            
-            # Convert to list of dictionaries
-            columns = [col[0] for col in self.cursor.description]
-            stats_dicts = [dict(zip(columns, row)) for row in all_stats]
-            
-            # Deduplicate the stats
-            deduplicated_stats = self._deduplicate_stats(stats_dicts)
-            
-            return deduplicated_stats
+            # Rows are sqlite3.Row, so dict() needs no column list. Every
+            # row carries its primary key, which _deduplicate_stats keys on
+            # first, so a dedup pass here could never drop anything
+            return [dict(row) for row in self.cursor]
             
         except sqlite3.Error as e:
-            print(f"Error retrieving player stats: {e}")
+            log.warning("Error retrieving player stats: %s", e)
             return []
     
     def get_player_remote_stats(self, player_name):
@@ -868,84 +1488,183 @@ class SyncGameDatabase(OriginalGameDatabase):
                 "error": str or None  # Error message if any
             }
         """
+        return self._remote_player_result(
+            player_name, lambda: self._request_player_stats(player_name))
+    
+    def _request_player_stats(self, player_name):
+        """Send the player stats GET; network only, safe to run on a pool thread."""
+        # The name is a path segment, so '/', '?', '#' and friends must be
+        # escaped; freshness comes from If-None-Match, not a cache-buster
+        return self.http.get(self._player_url % quote(player_name, safe=""),
+                             headers=self._conditional_headers(("player", player_name)),
+                             timeout=5)
+    
+    def _remote_player_result(self, player_name, fetch):
+        """
+        Turn a player stats response into results, falling back to local data.
+        
+        Args:
+            player_name: The name of the player
+            fetch: Callable returning the server response (or raising)
+        """
         try:
             if not self.online:
                 return self._get_local_only_stats(player_name, "Server unavailable")
             
-            base_url = self.server_url.rstrip('/')
-            # Add cache-busting parameter to avoid stale data
-            cache_buster = int(time.time())
-            url = f"{base_url}/api/player/{player_name}?t={cache_buster}"
-            
-            try:
-                response = requests.get(url, timeout=5)
-            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
-                print(f"Connection error while getting remote player stats: {e}")
-                self.using_cached_data = True
-                return self._get_local_only_stats(player_name, f"Connection error: {e}")
-            
-            if response.status_code == 200:
+            cache_key = ("player", player_name)
+            server_data = self._cache_get(cache_key)
+            if server_data is None:
+                try:
+                    response = fetch()
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                    log.warning("Connection error while getting remote player stats: %s", e)
+                    self._note_reachable(False)
+                    self.using_cached_data = True
+                    return self._get_local_only_stats(player_name, f"Connection error: {e}")
+                
                 try:
-                    server_data = response.json()
+                    server_data = self._response_body(cache_key, response)
                 except ValueError as e:
-                    print(f"Error parsing server response: {e}")
+                    log.warning("Error parsing server response: %s", e)
                     return self._get_local_only_stats(player_name, f"Invalid server response: {e}")
-                
-                # Get local-only data (source='local') for this player
-                query = '''
-                    SELECT id, player_name, difficulty, start_time, end_time, 
-                           duration_seconds, moves, matches, errors, completed, source
-                    FROM game_stats 
-                    WHERE player_name = ? AND source = 'local'
-                '''
-                
-                self.cursor.execute(query, (player_name,))
-                local_records = self.cursor.fetchall()
-                
-                local_stats = []
-                for record in local_records:
-                    stat_dict = {
-                        "id": record[0],
-                        "player_name": record[1],
-                        "difficulty": record[2],
-                        "start_time": record[3],
-                        "end_time": record[4],
-                        "duration_seconds": record[5],
-                        "moves": record[6],
-                        "matches": record[7],
-                        "errors": record[8],
-                        "completed": bool(record[9]),
-                        "source": record[10],
-                        "local": True
-                    }
-                    local_stats.append(stat_dict)
-                
-                # Mark server stats
-                server_stats = server_data.get("stats", [])
-                for stat in server_stats:
-                    stat["server"] = True
-                    stat["source"] = "server"  # Add source tag for deduplication
-                
-                # Deduplicate server stats
-                deduplicated_server_stats = self._deduplicate_stats(server_stats)
-                
-                # Create combined data structure with consistent format
-                return {
-                    "player": player_name,
-                    "stats": deduplicated_server_stats,  # Use server data as primary 
-                    "local_stats": local_stats,  # Include local stats separately
-                    "has_local_data": len(local_stats) > 0,
-                    "using_cached": False,
-                    "error": None
-                }
-            else:
-                print(f"Error getting remote player stats: {response.status_code}")
-                return self._get_local_only_stats(player_name, f"Server error: {response.status_code}")
-                
+                if server_data is None:
+                    log.warning("Error getting remote player stats: %s", response.status_code)
+                    return self._get_local_only_stats(player_name, f"Server error: {response.status_code}")
+                self._note_reachable(True)
+            
+            # Get local-only data (source='local') for this player
+            query = '''
+                SELECT id, player_name, difficulty, start_time, end_time, 
+                       duration_seconds, moves, matches, errors, completed, source
+                FROM game_stats 
+                WHERE player_name = ? AND source = 'local'
+            '''
+            
+            self.cursor.execute(query, (player_name,))
+            local_stats = [
+                {**dict(record), "completed": bool(record["completed"]), "local": True}
+                for record in self.cursor
+            ]
+            
+            # Mark server stats (on copies, the response may be cached);
+            # the source tag is used for deduplication. Servers that predate
+            # the full "stats" list only send the ten newest as "recent_games"
+            games = server_data.get("stats", server_data.get("recent_games", []))
+            server_stats = ({**stat, "server": True, "source": "server"}
+                            for stat in games)
+            
+            # Deduplicate server stats while tagging them, so only the kept
+            # copies are ever held at once
+            deduplicated_server_stats = self._deduplicate_stats(server_stats)
+            
+            # Create combined data structure with consistent format
+            return {
+                "player": player_name,
+                "stats": deduplicated_server_stats,  # Use server data as primary 
+                "local_stats": local_stats,  # Include local stats separately
+                "has_local_data": len(local_stats) > 0,
+                "using_cached": False,
+                "error": None
+            }
+            
         except Exception as e:
-            print(f"Failed to get remote player stats: {e}")
+            log.warning("Failed to get remote player stats: %s", e)
             return self._get_local_only_stats(player_name, f"Error: {e}")
             
+    def get_remote_leaderboards(self, difficulties: List[str],
+                                limit: int = 10) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Get the remote leaderboards for several difficulties together.
+        
+        The GETs are in flight at the same time, so this costs about one
+        round trip instead of one per difficulty. Fallbacks work as in
+        get_remote_leaderboard.
+        
+        Args:
+            difficulties: Game difficulties (Easy, Medium, Hard)
+            limit: Maximum number of records per leaderboard
+            
+        Returns:
+            Dictionary mapping each difficulty to its leaderboard
+        """
+        self.using_cached_data = False
+        self.check_server_connection(wait=False)
+        
+        fetches = {}
+        for difficulty in difficulties:
+            fetch = lambda difficulty=difficulty: self._request_leaderboard(difficulty, limit)
+            # Send only what the response cache cannot answer
+            if self.online and self._cache_get(("leaderboard", difficulty, limit)) is None:
+                fetch = self._get_http_pool().submit(fetch).result
+            fetches[difficulty] = fetch
+        
+        return {difficulty: self._remote_leaderboard_result(difficulty, limit, fetch)
+                for difficulty, fetch in fetches.items()}
+    
+    def _cache_get(self, key):
+        """Return a cached response body, or None if missing or expired."""
+        with self._resp_cache_lock:
+            entry = self._resp_cache.get(key)
+        if entry is not None and time.monotonic() - entry[0] < self.RESPONSE_CACHE_TTL:
+            return entry[1]
+        return None
+    
+    def _cache_put(self, key, body, etag: Optional[str] = None) -> None:
+        """Remember a decoded response body for RESPONSE_CACHE_TTL seconds."""
+        with self._resp_cache_lock:
+            self._resp_cache[key] = (time.monotonic(), body, etag)
+    
+    def _conditional_headers(self, key) -> Optional[Dict[str, str]]:
+        """
+        If-None-Match header for a request whose last response had an ETag.
+        
+        Expired entries still count: the server can confirm them with a 304
+        instead of sending the body again.
+        """
+        with self._resp_cache_lock:
+            entry = self._resp_cache.get(key)
+        if entry is not None and entry[2]:
+            return {"If-None-Match": entry[2]}
+        return None
+    
+    def _response_body(self, key, response):
+        """
+        Decoded body of a GET response, keeping the response cache up to date.
+        
+        A 200 is decoded and cached with its ETag; a 304 Not Modified renews
+        the cached body and returns it. Anything else gives None.
+        
+        The upload worker may clear the cache while the request is in flight;
+        a 304 that finds nothing cached is sent again without If-None-Match.
+        """
+        if response.status_code == 200:
+            body = _json_loads(response.content)
+            self._cache_put(key, body, response.headers.get("ETag"))
+            return body
+        if response.status_code == 304:
+            with self._resp_cache_lock:
+                entry = self._resp_cache.get(key)
+                if entry is not None:
+                    self._resp_cache[key] = (time.monotonic(),) + entry[1:]
+                    return entry[1]
+            request = response.request.copy()
+            if request.headers.pop("If-None-Match", None) is not None:
+                log.debug("Cached response gone, fetching %s again", request.url)
+                return self._response_body(key, self.http.send(request, timeout=5))
+        return None
+    
+    def _invalidate_cache(self) -> None:
+        """Forget cached server responses after new stats reach the server."""
+        with self._resp_cache_lock:
+            self._resp_cache.clear()
+    
+    def _get_http_pool(self) -> ThreadPoolExecutor:
+        """Get the thread pool used for concurrent GETs, creating it if needed."""
+        if self._http_pool is None:
+            self._http_pool = ThreadPoolExecutor(max_workers=4,
+                                                 thread_name_prefix="stats-fetch")
+        return self._http_pool
+    
     def _get_local_only_stats(self, player_name, error_message):
         """
         Helper method to get local-only stats with consistent return format.
@@ -958,7 +1677,7 @@ class SyncGameDatabase(OriginalGameDatabase):
             Dictionary with local stats in the same format as remote stats
         """
         self.using_cached_data = True
-        print(f"Using local-only stats for {player_name} ({error_message})")
+        log.info("Using local-only stats for %s (%s)", player_name, error_message)
         
         # Only get local data
         query = '''
@@ -969,33 +1688,16 @@ class SyncGameDatabase(OriginalGameDatabase):
         '''
         
         self.cursor.execute(query, (player_name,))
-        records = self.cursor.fetchall()
-        
-        stats = []
-        for record in records:
-            stat_dict = {
-                "id": record[0],
-                "player_name": record[1],
-                "difficulty": record[2],
-                "start_time": record[3],
-                "end_time": record[4],
-                "duration_seconds": record[5],
-                "moves": record[6],
-                "matches": record[7],
-                "errors": record[8],
-                "completed": bool(record[9]),
-                "source": record[10],
-                "local": True,
-                "cached": True
-            }
-            stats.append(stat_dict)
-        
-        # Deduplicate local stats
-        deduplicated_stats = self._deduplicate_stats(stats)
+        stats = [
+            {**dict(record), "completed": bool(record["completed"]),
+             "local": True, "cached": True}
+            for record in self.cursor
+        ]
         
+        # No dedup pass: like in get_player_stats, each row has a unique id
         return {
             "player": player_name,
-            "stats": deduplicated_stats,
+            "stats": stats,
             "local_stats": [],  # Empty since all stats are already in the main list
             "has_local_data": True,  # All data is local
             "using_cached": True,
@@ -1004,54 +1706,66 @@ class SyncGameDatabase(OriginalGameDatabase):
     
     def force_sync_all(self):
         """
-        This method has been deprecated.
-        
-        In the new design, we don't sync local data to the server,
-        data is only sent directly to the server when a game ends.
+        Check the server connection and catch up on games that stayed local.
         
-        This method now only checks the server connection.
+        Games are sent by the upload worker when they are saved. Those it
+        couldn't send (server offline, queue full) keep synced = 0; when the
+        server is online the worker is woken to upload them, so this call
+        never waits on the uploads.
         """
         if not self.online:
-            self.check_server_connection()
+            self.check_server_connection(force=True)
             
         if self.online:
-            print("Server connection is online")
+            log.info("Server connection is online")
+            if self._sync_pending:
+                try:
+                    self._out_q.put_nowait(self._SYNC_PENDING)
+                except queue.Full:
+                    # The worker is busy anyway and catches up once it drains
+                    pass
             return True
         else:
-            print("Server connection is offline")
+            log.info("Server connection is offline")
             return False
     
+    def _has_any(self) -> bool:
+        """Check whether there are any local records; EXISTS stops at the first row."""
+        self.cursor.execute("SELECT EXISTS(SELECT 1 FROM game_stats)")
+        return bool(self.cursor.fetchone()[0])
+    
     def detect_server_reset(self):
         """
         Detect if the server database has been reset or has significantly fewer records
         than our local cache, which might indicate a server wipe.
         """
         try:
-            # Count records in local DB
-            self.cursor.execute("SELECT COUNT(*) FROM game_stats")
-            local_count = self.cursor.fetchone()[0]
-            
             # If we have no local data, no need to check
-            if local_count == 0:
+            if not self._has_any():
                 return False
             
             # Get server record count for comparison
-            base_url = self.server_url.rstrip('/')
-            url = f"{base_url}/api/stats/count"
+            url = self._count_url
             
             try:
                 # Try to get record count from server
-                response = requests.get(url, timeout=5)
+                response = self.http.get(url, timeout=5)
                 
                 if response.status_code == 200:
                     try:
-                        server_data = response.json()
+                        server_data = _json_loads(response.content)
                         server_count = server_data.get("count", 0)
                         
-                        # If server has significantly fewer records than local DB
-                        if server_count < local_count * 0.5 and server_count < 10:
-                            print(f"Server reset detected! Server: {server_count}, Local: {local_count}")
-                            return True
+                        # If server has significantly fewer records than local DB.
+                        # Only a few local rows need counting to decide that
+                        if server_count < 10:
+                            self.cursor.execute(
+                                "SELECT COUNT(*) FROM (SELECT 1 FROM game_stats LIMIT ?)",
+                                (2 * server_count + 1,))
+                            local_count = self.cursor.fetchone()[0]
+                            if server_count < local_count * 0.5:
+                                log.warning("Server reset detected! Server: %s, Local: %s+", server_count, local_count)
+                                return True
                     except:
                         # If we can't parse server response, assume no reset
                         return False
@@ -1061,7 +1775,7 @@ class SyncGameDatabase(OriginalGameDatabase):
                 
             return False
         except Exception as e:
-            print(f"Error detecting server reset: {e}")
+            log.warning("Error detecting server reset: %s", e)
             return False
     
     def prompt_reset_local_cache(self):
@@ -1071,33 +1785,38 @@ class SyncGameDatabase(OriginalGameDatabase):
         """
         try:
             # Clear all data from game_stats table but keep the table structure
+            # Sync flags are stored on the rows, so they go with them
             self.cursor.execute("DELETE FROM game_stats")
-            
-            # Also clear any sync tracking data
-            if self.table_exists("sync_status"):
-                self.cursor.execute("DELETE FROM sync_status")
-                
             self.conn.commit()
-            print("Local cache of remote data has been reset")
+            log.info("Local cache of remote data has been reset")
             return True
         except Exception as e:
-            print(f"Error resetting local cache: {e}")
+            log.warning("Error resetting local cache: %s", e)
             return False
     
     def table_exists(self, table_name):
         """Check if a table exists in the database."""
-        self.cursor.execute(f"""
-            SELECT name FROM sqlite_master 
-            WHERE type='table' AND name='{table_name}'
-        """)
+        return self._schema_object_exists("table", table_name)
+    
+    def _schema_object_exists(self, object_type: str, name: str) -> bool:
+        """Check for a table or index; one bound statement serves every lookup."""
+        self.cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type=? AND name=? LIMIT 1",
+            (object_type, name)
+        )
         return self.cursor.fetchone() is not None
 
+    @staticmethod
+    def _game_key(player_name, difficulty, duration, errors, completed) -> str:
+        """Signature clean_database treats as the same game, for local rows."""
+        return f"{player_name}_{difficulty}_{duration:.2f}_{errors}_{completed}"
+    
     def clean_database(self):
         """
         Clean the database by removing all duplicates and ensuring proper schema.
         This is a utility function that can be called to fix duplicate records.
         """
-        print("Cleaning database and removing duplicates...")
+        log.debug("Cleaning database and removing duplicates...")
         try:
             # First ensure we have the proper columns
             self._ensure_source_column_exists()
@@ -1107,74 +1826,53 @@ class SyncGameDatabase(OriginalGameDatabase):
             self.conn.execute('BEGIN TRANSACTION')
             
             try:
-                # Get all stats
+                # Keep the first copy (lowest id) of every game: server rows
+                # are identified by their server ID, local rows by the game's
+                # properties. SQLite numbers the copies itself, so no rows
+                # have to be loaded into Python. The properties key is built
+                # by Python, as SQLite's printf('%.2f') rounds some durations
+                # (0.125, 2.675) differently and would merge distinct games
+                self.conn.create_function("game_key", 5, self._game_key)
                 self.cursor.execute('''
-                    SELECT id, player_name, difficulty, duration_seconds, errors, 
-                           completed, source, server_id
-                    FROM game_stats
+                    DELETE FROM game_stats
+                    WHERE id IN (
+                        SELECT id FROM (
+                            SELECT id, ROW_NUMBER() OVER (
+                                PARTITION BY COALESCE(
+                                    'server_' || server_id,
+                                    game_key(player_name, difficulty,
+                                             duration_seconds, errors, completed)
+                                )
+                                ORDER BY id
+                            ) AS copy_number
+                            FROM game_stats
+                        )
+                        WHERE copy_number > 1
+                    )
                 ''')
                 
-                all_records = self.cursor.fetchall()
-                print(f"Found {len(all_records)} total records")
-                
-                # Create a mapping of unique game signatures to record IDs
-                # Prefer server records over local ones
-                unique_records = {}
-                local_ids_to_delete = []
-                
-                for record in all_records:
-                    record_id = record[0]
-                    player_name = record[1]
-                    difficulty = record[2]
-                    duration = record[3]
-                    errors = record[4]
-                    completed = record[5]
-                    source = record[6]
-                    server_id = record[7]
-                    
-                    # Create a unique key for this record
-                    key = f"{player_name}_{difficulty}_{duration:.2f}_{errors}_{completed}"
-                    
-                    if server_id is not None:
-                        # If we have a server ID, use that as a definitive key
-                        server_key = f"server_{server_id}"
-                        if server_key in unique_records:
-                            # This is a true duplicate of a server record
-                            local_ids_to_delete.append(record_id)
-                        else:
-                            unique_records[server_key] = record_id
-                    elif key in unique_records:
-                        # This is a duplicate based on game properties
-                        local_ids_to_delete.append(record_id)
-                    else:
-                        unique_records[key] = record_id
-                
-                # Delete duplicate records
-                if local_ids_to_delete:
-                    placeholders = ','.join(['?'] * len(local_ids_to_delete))
-                    self.cursor.execute(f'''
-                        DELETE FROM game_stats
-                        WHERE id IN ({placeholders})
-                    ''', local_ids_to_delete)
-                    
-                    print(f"Deleted {len(local_ids_to_delete)} duplicate records")
+                if self.cursor.rowcount > 0:
+                    log.info("Deleted %s duplicate records", self.cursor.rowcount)
                 else:
-                    print("No duplicates found")
+                    log.debug("No duplicates found")
                 
                 # Commit all changes
                 self.conn.commit()
-                print("Database cleaning completed successfully")
+                log.info("Database cleaning completed successfully")
                 
             except Exception as e:
                 self.conn.rollback()
-                print(f"Error during database cleaning: {e}")
+                log.warning("Error during database cleaning: %s", e)
         finally:
             # Reset isolation level
             self.conn.isolation_level = None
 
 
 # Singleton instance for use throughout the application
-sync_db = SyncGameDatabase()
+# Created on first call to get_sync_database() so importing this module
+# does not open the database or probe the server
+sync_db: Optional[SyncGameDatabase] = None
+_sync_db_lock = threading.Lock()
 
 def get_sync_database(server_url=None) -> SyncGameDatabase:
     """
@@ -1186,9 +1884,15 @@ def get_sync_database(server_url=None) -> SyncGameDatabase:
     """
     global sync_db
     
-    # If a custom server URL is provided, create a new instance
-    if server_url and server_url != sync_db.server_url:
-        print(f"Creating new sync database instance with server URL: {server_url}")
-        sync_db = SyncGameDatabase(server_url=server_url)
+    with _sync_db_lock:
+        if sync_db is None:
+            sync_db = SyncGameDatabase(server_url=server_url or SERVER_URL)
+        # If a custom server URL is provided, create a new instance
+        elif server_url and _normalize_server_url(server_url) != sync_db.server_url:
+            log.debug("Creating new sync database instance with server URL: %s", server_url)
+            # Let the old instance send its queued games and stop its worker,
+            # HTTP session and connections before it is replaced
+            sync_db.close()
+            sync_db = SyncGameDatabase(server_url=server_url)
         
-    return sync_db 
\ No newline at end of file
+        return sync_db 
\ No newline at end of file
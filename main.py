@@ -23,13 +23,12 @@ DEFAULT_SERVER = "localhost:5000"  # Default server if no settings file exists
 
 def load_settings():
     """Load settings from settings.json file."""
-    if os.path.exists(SETTINGS_FILE):
-        try:
-            with open(SETTINGS_FILE, 'r') as f:
-                return json.load(f)
-        except json.JSONDecodeError:
-            return {"server_url": DEFAULT_SERVER}
-    return {"server_url": DEFAULT_SERVER}
+    # Just try the open: no separate exists() check that could race with it
+    try:
+        with open(SETTINGS_FILE, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"server_url": DEFAULT_SERVER}
 
 def save_settings(settings):
     """Save settings to settings.json file."""
@@ -89,9 +88,9 @@ def get_game_database(mode="local", server_url=None):
     elif mode == "remote":
         try:
             # Try to import and initialize the synchronized database
-            from database_sync import SyncGameDatabase
-            # Create a new instance with the specified server URL
-            current_db = SyncGameDatabase(db_file="memory_game.db", server_url=server_url)
+            from database_sync import get_sync_database
+            # Reuse the shared instance (and its upload worker) unless the URL changed
+            current_db = get_sync_database(server_url=server_url)
             print(f"Using server at {server_url} - your stats will be compared with other players")
             return current_db
         except Exception as e:
@@ -1387,8 +1386,7 @@ class GameGUI:
                                 self.flip_card_animation(row, col)
                                 
                                 # Check if this is the second card being flipped
-                                face_up_cards = [c for c in self.game.board.cards 
-                                               if c.is_face_up and not c.is_matched]
+                                face_up_cards = self.game.board.get_face_up_unmatched()
                                 
                                 # If we now have 2 cards face up, process the match check after animation
                                 if len(face_up_cards) == 2:
@@ -1421,8 +1419,7 @@ class GameGUI:
                 
                 elif event.type == pygame.USEREVENT:
                     # Check for matches
-                    face_up_cards = [c for c in self.game.board.cards 
-                                   if c.is_face_up and not c.is_matched]
+                    face_up_cards = self.game.board.get_face_up_unmatched()
                     
                     if len(face_up_cards) == 2:
                         # We have two cards face up, process the match
@@ -8,14 +8,29 @@ import os
 import sys
 import sqlite3
 import time
+import zlib
+import json
 from datetime import datetime
 from flask import Flask, request, jsonify, render_template
+from werkzeug.exceptions import RequestEntityTooLarge
+
+try:
+    # Optional: decodes the compressed bulk uploads faster than json
+    import orjson
+except ImportError:
+    orjson = None
 
 # Add parent directory to path to allow importing shared modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from shared.models import GameStats
 
+# Largest request body accepted as sent, and the most a gzipped body may
+# inflate to; a bulk upload of 100 games is a few tens of KB
+MAX_BODY_BYTES = 1024 * 1024
+MAX_INFLATED_BYTES = 4 * 1024 * 1024
+
 app = Flask(__name__)
+app.config['MAX_CONTENT_LENGTH'] = MAX_BODY_BYTES
 DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "server/server_stats.db")
 
 def init_db():
@@ -76,7 +91,9 @@ def index():
             <div class="stats">
                 <h2>API Endpoints:</h2>
                 <ul>
+                    <li>/api/health - GET/HEAD: Check that the server is up</li>
                     <li>/api/stats/save - POST: Save new statistics</li>
+                    <li>/api/stats/save_bulk - POST: Save several games' statistics at once</li>
                     <li>/api/stats/leaderboard/:difficulty - GET: Get leaderboard for a difficulty</li>
                     <li>/api/stats/player/:name - GET: Get statistics for a specific player</li>
                 </ul>
@@ -89,28 +106,115 @@ def index():
     </html>
     """
 
+REQUIRED_FIELDS = ['player_name', 'difficulty', 'start_time', 
+                   'end_time', 'moves', 'matches', 'completed']
+
+# Most games a player stats lookup lists; the aggregates still cover all
+PLAYER_STATS_LIMIT = 200
+
+INSERT_STATS_SQL = '''
+    INSERT INTO game_stats (
+        player_name, difficulty, start_time, end_time, 
+        duration_seconds, moves, matches, errors, completed, sync_time,
+        client_id, local_id
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+def request_json():
+    """Return the request's JSON body, inflating it if the client gzipped it."""
+    if request.content_encoding == 'gzip':
+        # Inflate at most one byte past the cap, so a small body can't
+        # expand to gigabytes in memory
+        inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        body = inflater.decompress(request.get_data(), MAX_INFLATED_BYTES + 1)
+        if len(body) > MAX_INFLATED_BYTES:
+            raise RequestEntityTooLarge()
+        if not inflater.eof:
+            raise ValueError("Truncated gzip body")
+        return orjson.loads(body) if orjson is not None else json.loads(body)
+    return request.json
+
+def conditional_json(payload):
+    """
+    Build a JSON response tagged with an ETag of its body.
+    
+    A client that sends the same ETag back in If-None-Match gets an empty
+    304 Not Modified instead of the full body.
+    """
+    response = jsonify(payload)
+    response.add_etag()
+    return response.make_conditional(request)
+
+def prepare_stats(data):
+    """
+    Validate submitted stats and fill in the derived fields.
+    
+    Returns:
+        None if the data is valid, otherwise the error message
+    """
+    for field in REQUIRED_FIELDS:
+        if field not in data:
+            print(f"Missing required field: {field}")
+            return f"Missing required field: {field}"
+    
+    # Calculate derived fields if not provided
+    if 'duration_seconds' not in data:
+        data['duration_seconds'] = data['end_time'] - data['start_time']
+    
+    if 'errors' not in data:
+        data['errors'] = max(0, data['moves'] - data['matches'])
+    return None
+
+def find_duplicate(cursor, data, client_id, sync_time):
+    """Return the ID of an already stored copy of these stats, or None."""
+    # If local_id is provided in the data, use it for deduplication
+    if 'local_id' in data:
+        cursor.execute('''
+            SELECT id FROM game_stats
+            WHERE player_name = ? AND start_time = ? AND end_time = ? 
+            AND client_id = ? AND local_id = ?
+        ''', (
+            data['player_name'], data['start_time'], data['end_time'],
+            client_id, data['local_id']
+        ))
+    else:
+        # Fallback to time-based duplicate detection
+        cursor.execute('''
+            SELECT id FROM game_stats
+            WHERE player_name = ? AND start_time = ? AND end_time = ? 
+            AND ABS(sync_time - ?) < 60
+        ''', (
+            data['player_name'], data['start_time'], data['end_time'], sync_time
+        ))
+    
+    existing_record = cursor.fetchone()
+    return existing_record['id'] if existing_record else None
+
+def stats_row(data, client_id, sync_time):
+    """Build the INSERT parameters for one set of stats."""
+    return (
+        data['player_name'], data['difficulty'], data['start_time'], 
+        data['end_time'], data['duration_seconds'], data['moves'], 
+        data['matches'], data['errors'], data['completed'], sync_time,
+        client_id, data.get('local_id', -1)  # Store local_id if provided
+    )
+
+@app.route('/api/health', methods=['GET'])
+def health():
+    """Cheap liveness check for clients: no body, no database access."""
+    return '', 204
+
 @app.route('/api/stats/save', methods=['POST'])
 def save_stats():
     """Save game statistics from the client."""
     try:
-        data = request.json
+        data = request_json()
         print(f"Received save request with data: {data}")
         
         # Validate required fields
-        required_fields = ['player_name', 'difficulty', 'start_time', 
-                          'end_time', 'moves', 'matches', 'completed']
-        
-        for field in required_fields:
-            if field not in data:
-                print(f"Missing required field: {field}")
-                return jsonify({"error": f"Missing required field: {field}"}), 400
-        
-        # Calculate derived fields if not provided
-        if 'duration_seconds' not in data:
-            data['duration_seconds'] = data['end_time'] - data['start_time']
-        
-        if 'errors' not in data:
-            data['errors'] = max(0, data['moves'] - data['matches'])
+        error = prepare_stats(data)
+        if error:
+            return jsonify({"error": error}), 400
         
         # Add sync time
         sync_time = time.time()
@@ -125,30 +229,9 @@ def save_stats():
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
-        # If local_id is provided in the data, use it for deduplication
-        if 'local_id' in data:
-            cursor.execute('''
-                SELECT id FROM game_stats
-                WHERE player_name = ? AND start_time = ? AND end_time = ? 
-                AND client_id = ? AND local_id = ?
-            ''', (
-                data['player_name'], data['start_time'], data['end_time'],
-                client_id, data['local_id']
-            ))
-        else:
-            # Fallback to time-based duplicate detection
-            cursor.execute('''
-                SELECT id FROM game_stats
-                WHERE player_name = ? AND start_time = ? AND end_time = ? 
-                AND ABS(sync_time - ?) < 60
-            ''', (
-                data['player_name'], data['start_time'], data['end_time'], sync_time
-            ))
-        
-        existing_record = cursor.fetchone()
-        if existing_record:
+        record_id = find_duplicate(cursor, data, client_id, sync_time)
+        if record_id is not None:
             # This appears to be a duplicate submission
-            record_id = existing_record['id']
             conn.close()
             print(f"Duplicate game stat detected, returning existing ID: {record_id}")
             return jsonify({
@@ -159,18 +242,7 @@ def save_stats():
             }), 409  # 409 Conflict
         
         # If we reach here, this is not a duplicate, so save to database
-        cursor.execute('''
-            INSERT INTO game_stats (
-                player_name, difficulty, start_time, end_time, 
-                duration_seconds, moves, matches, errors, completed, sync_time,
-                client_id, local_id
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            data['player_name'], data['difficulty'], data['start_time'], 
-            data['end_time'], data['duration_seconds'], data['moves'], 
-            data['matches'], data['errors'], data['completed'], sync_time,
-            client_id, data.get('local_id', -1)  # Store local_id if provided
-        ))
+        cursor.execute(INSERT_STATS_SQL, stats_row(data, client_id, sync_time))
         
         conn.commit()
         record_id = cursor.lastrowid
@@ -183,22 +255,111 @@ def save_stats():
             "id": record_id
         })
     
+    except RequestEntityTooLarge:
+        return jsonify({"error": "Request body too large"}), 413
+    
     except Exception as e:
         print(f"Error saving stats: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/stats/save_bulk', methods=['POST'])
+def save_stats_bulk():
+    """Save several games' statistics from one client in a single transaction."""
+    try:
+        data = request_json()
+        if not isinstance(data, dict):
+            return jsonify({"error": "Request body must be an object"}), 400
+        items = data.get('items')
+        if not isinstance(items, list):
+            return jsonify({"error": "Missing required field: items"}), 400
+        
+        # Add sync time
+        sync_time = time.time()
+        client_id = data.get('client_id', 'unknown')
+        print(f"Received bulk save request with {len(items)} items from client: {client_id}")
+        
+        conn = sqlite3.connect(DB_PATH)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        
+        rows = []
+        duplicates = 0
+        invalid = []
+        # find_duplicate only sees committed rows, so repeats within this
+        # batch are matched here, by the same rules: items carrying a
+        # local_id by client and local_id, the rest by player and times
+        # (the whole batch shares one sync_time)
+        accepted = set()
+        accepted_times = set()
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                invalid.append({"index": index, "error": "Item must be an object"})
+                continue
+            error = prepare_stats(item)
+            if error:
+                invalid.append({"index": index, "error": error})
+                continue
+            item_client_id = item.get('client_id', client_id)
+            times = (item['player_name'], item['start_time'], item['end_time'])
+            if 'local_id' in item:
+                repeated = times + (item_client_id, item['local_id']) in accepted
+            else:
+                repeated = times in accepted_times
+            if repeated or find_duplicate(cursor, item, item_client_id, sync_time) is not None:
+                duplicates += 1
+            else:
+                rows.append(stats_row(item, item_client_id, sync_time))
+                accepted.add(times + (item_client_id, item.get('local_id', -1)))
+                accepted_times.add(times)
+        
+        # One statement and one commit for the whole batch
+        cursor.executemany(INSERT_STATS_SQL, rows)
+        conn.commit()
+        conn.close()
+        
+        print(f"Bulk save stored {len(rows)} stats, skipped {duplicates} duplicates and {len(invalid)} invalid items")
+        return jsonify({
+            "success": True,
+            "message": "Statistics saved successfully",
+            "saved": len(rows),
+            "duplicates": duplicates,
+            "invalid": invalid
+        })
+    
+    except RequestEntityTooLarge:
+        return jsonify({"error": "Request body too large"}), 413
+    
+    except Exception as e:
+        print(f"Error saving bulk stats: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/stats/leaderboard/<difficulty>', methods=['GET'])
 def get_leaderboard(difficulty):
     """Get leaderboard for a specific difficulty."""
     try:
         limit = request.args.get('limit', 10, type=int)
+        # With per_difficulty=1, 'all' returns the top `limit` of each
+        # difficulty, so a client can refresh every board in one request
+        per_difficulty = (difficulty.lower() == 'all'
+                          and request.args.get('per_difficulty', 0, type=int) == 1)
         
         conn = sqlite3.connect(DB_PATH)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
+        if per_difficulty:
+            rows = []
+            for board in ('Easy', 'Medium', 'Hard'):
+                cursor.execute('''
+                    SELECT id, player_name, difficulty, duration_seconds, errors
+                    FROM game_stats
+                    WHERE difficulty = ? AND completed = 1
+                    ORDER BY duration_seconds ASC, errors ASC
+                    LIMIT ?
+                ''', (board, limit))
+                rows.extend(cursor.fetchall())
         # For 'all' difficulty, don't filter by difficulty
-        if difficulty.lower() == 'all':
+        elif difficulty.lower() == 'all':
             cursor.execute('''
                 SELECT id, player_name, difficulty, duration_seconds, errors
                 FROM game_stats
@@ -215,7 +376,9 @@ def get_leaderboard(difficulty):
                 LIMIT ?
             ''', (difficulty, limit))
         
-        results = [dict(row) for row in cursor.fetchall()]
+        if not per_difficulty:
+            rows = cursor.fetchall()
+        results = [dict(row) for row in rows]
         conn.close()
         
         # Format times for display
@@ -224,60 +387,76 @@ def get_leaderboard(difficulty):
             seconds = result['duration_seconds'] % 60
             result['formatted_time'] = f"{minutes:02d}:{seconds:05.2f}"
         
-        return jsonify({"leaderboard": results})
+        if per_difficulty:
+            return conditional_json({"leaderboard": results, "per_difficulty": True})
+        return conditional_json({"leaderboard": results})
     
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/stats/player/<name>', methods=['GET'])
+# path: so a name containing '/' still reaches this route in one piece
+@app.route('/api/stats/player/<path:name>', methods=['GET'])
 def get_player_stats(name):
-    """Get statistics for a specific player."""
+    """
+    Get statistics for a specific player.
+    
+    The aggregates cover every game; the "stats" list holds only the newest
+    `limit` games (default and cap PLAYER_STATS_LIMIT), so a long history
+    isn't sent on each lookup.
+    """
     try:
+        limit = max(0, min(request.args.get('limit', PLAYER_STATS_LIMIT, type=int),
+                           PLAYER_STATS_LIMIT))
+        
         conn = sqlite3.connect(DB_PATH)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
+        # Calculate aggregate stats over the full history
         cursor.execute('''
-            SELECT id, player_name, difficulty, start_time, end_time, 
-                   duration_seconds, moves, matches, errors, completed
+            SELECT difficulty, COUNT(*) AS total_games,
+                   SUM(completed) AS completed_games,
+                   MIN(CASE WHEN completed THEN duration_seconds END) AS best_time,
+                   AVG(CASE WHEN completed THEN duration_seconds END) AS avg_time
             FROM game_stats
             WHERE player_name = ?
-            ORDER BY start_time DESC
+            GROUP BY difficulty
         ''', (name,))
+        totals = {row['difficulty']: row for row in cursor.fetchall()}
+        total_games = sum(row['total_games'] for row in totals.values())
+        total_completed = sum(row['completed_games'] for row in totals.values())
         
-        results = [dict(row) for row in cursor.fetchall()]
-        
-        # Calculate aggregate stats
         difficulty_stats = {}
-        total_games = len(results)
-        total_completed = sum(1 for r in results if r['completed'])
-        
         for difficulty in ['Easy', 'Medium', 'Hard']:
-            diff_games = [r for r in results if r['difficulty'] == difficulty]
-            diff_completed = [r for r in diff_games if r['completed']]
-            
-            if diff_completed:
-                best_time = min(r['duration_seconds'] for r in diff_completed)
-                avg_time = sum(r['duration_seconds'] for r in diff_completed) / len(diff_completed)
-            else:
-                best_time = None
-                avg_time = None
-            
+            row = totals.get(difficulty)
             difficulty_stats[difficulty] = {
-                'total_games': len(diff_games),
-                'completed_games': len(diff_completed),
-                'best_time': best_time,
-                'avg_time': avg_time
+                'total_games': row['total_games'] if row else 0,
+                'completed_games': row['completed_games'] if row else 0,
+                'best_time': row['best_time'] if row else None,
+                'avg_time': row['avg_time'] if row else None
             }
         
+        cursor.execute('''
+            SELECT id, player_name, difficulty, start_time, end_time, 
+                   duration_seconds, moves, matches, errors, completed
+            FROM game_stats
+            WHERE player_name = ?
+            ORDER BY start_time DESC
+            LIMIT ?
+        ''', (name, limit))
+        
+        results = [dict(row) for row in cursor.fetchall()]
+        
         conn.close()
         
-        return jsonify({
+        return conditional_json({
             "player": name,
             "total_games": total_games,
             "completed_games": total_completed,
             "difficulty_stats": difficulty_stats,
-            "recent_games": results[:10]  # Only return 10 most recent
+            "recent_games": results[:10],  # Only return 10 most recent
+            "stats": results,  # Newest games, for clients that list them
+            "stats_truncated": len(results) < total_games
         })
     
     except Exception as e:
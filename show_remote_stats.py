@@ -87,16 +87,19 @@ class RemoteStatsGameGUI(GameGUI):
         title = FONT_MEDIUM.render("Game Statistics (with Remote Data)", True, BLUE)
         self.screen.blit(title, (self.width // 2 - title.get_width() // 2, 30))
         
-        # Get local and remote leaderboard data
+        # Try to get remote leaderboard data (will fall back to local if offline);
+        # the three requests are sent together
+        remote = db.get_remote_leaderboards(["Easy", "Medium", "Hard"], limit=5)
+        remote_easy = remote["Easy"]
+        remote_medium = remote["Medium"]
+        remote_hard = remote["Hard"]
+        
+        # Get local leaderboard data; while online these are answered from the
+        # responses just fetched, so they must come second
         local_easy = db.get_leaderboard(difficulty="Easy", limit=5)
         local_medium = db.get_leaderboard(difficulty="Medium", limit=5)
         local_hard = db.get_leaderboard(difficulty="Hard", limit=5)
         
-        # Try to get remote leaderboard data (will fall back to local if offline)
-        remote_easy = db.get_remote_leaderboard(difficulty="Easy", limit=5) 
-        remote_medium = db.get_remote_leaderboard(difficulty="Medium", limit=5)
-        remote_hard = db.get_remote_leaderboard(difficulty="Hard", limit=5)
-        
         # Setup tab structure - now we have local and global tabs
         tab_width, tab_height = 120, 40
         tabs_y = 100